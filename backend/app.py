@@ -1,19 +1,31 @@
 # backend/app.py
 import os
 import io
+import asyncio
 import re
 import json
 import csv
+import codecs
 import time
 import math
+import sys
 import logging
-import tempfile
+import heapq
+import multiprocessing
+import contextlib
+from functools import lru_cache
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from decimal import Decimal
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Tuple
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Tuple, BinaryIO, Deque, Iterable, Iterator, Mapping, NamedTuple
 
 from fastapi import (
     FastAPI,
+    BackgroundTasks,
     UploadFile,
     File,
     HTTPException,
@@ -22,13 +34,14 @@ from fastapi import (
     Depends,
     Header,
     Body,
+    Response,
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from dotenv import load_dotenv
 
-from starlette.responses import Response, FileResponse
+from starlette.responses import PlainTextResponse, FileResponse
 from starlette.types import ASGIApp, Receive, Scope, Send
 
 # --- reportlab for PDF export ---
@@ -43,18 +56,23 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.utils import ImageReader
 
 # --- Utilities ---
-from utils.analyze import analyze_csv_rows
+from utils.analyze import analyze_csv_rows_with_totals
 from utils.s3_utils import (
-    read_s3_file,
+    open_s3_text_with_etag,
     use_s3,
     put_s3_object,
+    upload_s3_fileobj,
     list_s3_objects,
+    list_s3_keys,
     delete_s3_object,
     generate_presigned_get_url,
+    generate_presigned_put_url,
+    warm_s3_client,
 )
-from utils.bedrock_client import get_ai_json
+from utils.bedrock_client import get_ai_json_async, warm_bedrock_client
 from utils.kiros_mock import get_mock_kiros_clients
-from utils.cognito_verify import verify_bearer  # strict JWKS verify
+from utils.cognito_verify import verify_bearer_cached, aclose_http as close_jwks_http  # strict JWKS verify
+from utils import list_cache
 
 from utils.superops import run_superops_action
 from utils.ddb import put_action_item
@@ -110,26 +128,60 @@ PDF_LOGO_PATH = os.getenv(
     "PDF_LOGO_PATH",
     os.path.join(os.path.dirname(__file__), "data", "logo.png")
 )
-
-# create tables on startup
-Base.metadata.create_all(bind=engine)
-
-print("DEBUG: Provider =", PROVIDER)
-print("DEBUG: AWS Region (effective) =", AWS_REGION_EFFECTIVE)
-print("DEBUG: Model ID =", os.getenv("BEDROCK_MODEL_ID"))
-print("DEBUG: Access Key Present =", bool(os.getenv("AWS_ACCESS_KEY_ID")))
-print("DEBUG: AWS_PROFILE =", os.getenv("AWS_PROFILE"))
-print("DEBUG: COGNITO_ENABLED =", COGNITO_ENABLED)
-print("DEBUG: ADMIN_EMAILS =", ADMIN_EMAILS)
-print("DEBUG: ADMIN_GROUP =", ADMIN_GROUP or "(none)")
-print("DEBUG: BUDGETS_TENANTED =", BUDGETS_TENANTED)
-print("DEBUG: BUDGETS_TENANT_DEFAULT =", BUDGETS_TENANT_DEFAULT)
-print("DEBUG: PUBLIC_BUDGET_SUB =", PUBLIC_BUDGET_SUB)
-print("DEBUG: ALLOW_PUBLIC_ACTIONS =", ALLOW_PUBLIC_ACTIONS)
-print("DEBUG: ALERT_WARN_PCT =", ALERT_WARN_PCT, " ALERT_BREACH_PCT =", ALERT_BREACH_PCT)
+# 0 = render PDFs in a worker thread instead of a process pool; by default the
+# cores are split across uvicorn workers (WEB_CONCURRENCY) so pools don't oversubscribe
+PDF_PROCESS_WORKERS = int(os.getenv(
+    "PDF_PROCESS_WORKERS",
+    str(max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", "1")))))
+))
+
+if logger.isEnabledFor(logging.INFO):
+    logger.info("startup config: %s", {
+        "provider": PROVIDER,
+        "region": AWS_REGION_EFFECTIVE,
+        "model_id": os.getenv("BEDROCK_MODEL_ID"),
+        "access_key_present": bool(os.getenv("AWS_ACCESS_KEY_ID")),
+        "aws_profile": os.getenv("AWS_PROFILE"),
+        "cognito_enabled": COGNITO_ENABLED,
+        "admin_emails": sorted(ADMIN_EMAILS),
+        "admin_group": ADMIN_GROUP or "(none)",
+        "budgets_tenanted": BUDGETS_TENANTED,
+        "budgets_tenant_default": BUDGETS_TENANT_DEFAULT,
+        "public_budget_sub": PUBLIC_BUDGET_SUB,
+        "allow_public_actions": ALLOW_PUBLIC_ACTIONS,
+        "alert_warn_pct": ALERT_WARN_PCT,
+        "alert_breach_pct": ALERT_BREACH_PCT,
+    })
 
 # --- FastAPI app ---
-app = FastAPI(title="FinOps+ Agent - Backend (Prototype)")
+try:
+    import orjson
+    _DefaultResponse = ORJSONResponse
+    _json_loads = orjson.loads
+    _json_bytes = orjson.dumps
+
+    def _json_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _DefaultResponse = JSONResponse
+    _json_loads = json.loads
+
+    def _json_default(o: Any) -> Any:
+        # orjson writes datetimes natively (ISO 8601); match it here
+        if isinstance(o, datetime):
+            return o.isoformat()
+        raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+    def _json_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, default=_json_default).encode("utf-8")
+
+    def _json_line(obj: Any) -> bytes:
+        return (json.dumps(obj) + "\n").encode("utf-8")
+
+app = FastAPI(
+    title="FinOps+ Agent - Backend (Prototype)",
+    default_response_class=_DefaultResponse,
+)
 
 # --- CORS ---
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS")
@@ -167,26 +219,105 @@ app.include_router(history_routes.router_compat)  # /history...
 
 # --------- Ensure no accidental compression/encoding on PDFs ----------
 class NoZipPDFMiddleware:
-    def __init__(self, app: ASGIApp):
+    """
+    Single pure-ASGI pass over response headers:
+      - strips any pre-set content-encoding (no accidental compression on PDFs)
+      - defaults Cache-Control / X-Content-Type-Options
+      - when allowed_origins is given, echoes CORS for allowed origins, also on
+        unhandled errors so browsers can read the 500
+    """
+    def __init__(self, app: ASGIApp, allowed_origins: Optional[Iterable[str]] = None):
         self.app = app
+        self.allowed_origins = frozenset(o.encode("latin-1") for o in (allowed_origins or ()))
+
     async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        if self.allowed_origins:
+            for k, v in scope.get("headers", ()):
+                if k == b"origin":
+                    if v in self.allowed_origins:
+                        origin = v
+                    break
+        started = False
+
         async def send_wrapper(message):
+            nonlocal started
             if message["type"] == "http.response.start":
-                headers = [(k.lower(), v) for k, v in message.get("headers", [])]
-                # strip any pre-set content-encoding
-                headers = [(k, v) for (k, v) in headers if k != b"content-encoding"]
+                started = True
+                headers = []
+                has_cache_control = has_nosniff = False
+                for k, v in message.get("headers", ()):
+                    k = k.lower()
+                    if k == b"content-encoding":
+                        continue
+                    if origin is not None and (k == b"access-control-allow-origin" or k == b"vary"):
+                        continue
+                    if k == b"cache-control":
+                        has_cache_control = True
+                    elif k == b"x-content-type-options":
+                        has_nosniff = True
+                    headers.append((k, v))
+                if not has_cache_control:
+                    headers.append((b"cache-control", b"no-store"))
+                if not has_nosniff:
+                    headers.append((b"x-content-type-options", b"nosniff"))
+                if origin is not None:
+                    headers.append((b"access-control-allow-origin", origin))
+                    headers.append((b"vary", b"Origin"))
                 message["headers"] = headers
             await send(message)
-        await self.app(scope, receive, send_wrapper)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if started or not self.allowed_origins:
+                raise
+            logger.exception("Unhandled error on %s", scope.get("path"))
+            await PlainTextResponse("Internal Server Error", status_code=500)(scope, receive, send_wrapper)
 
 app.add_middleware(NoZipPDFMiddleware)
 
-@app.middleware("http")
-async def add_security_headers(request, call_next):
-    resp: Response = await call_next(request)
-    resp.headers.setdefault("Cache-Control", "no-store")
-    resp.headers.setdefault("X-Content-Type-Options", "nosniff")
-    return resp
+# DDL runs at startup, not import. Mangum replays startup on every invocation,
+# so it runs at most once per process; on Lambda the routers create tables lazily.
+DB_INIT_ON_START = os.getenv("DB_INIT_ON_START", "true").lower() == "true"
+_db_ready = False
+
+def _create_schema() -> None:
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so indexes added to the models
+    # later (e.g. action_logs.time) are created here on older databases
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                logger.warning("Index %s not created: %s", index.name, e)
+
+@app.on_event("startup")
+async def _bootstrap_db():
+    global _db_ready
+    if _db_ready or not DB_INIT_ON_START:
+        return
+    try:
+        await asyncio.to_thread(_create_schema)
+        _db_ready = True
+    except Exception as e:
+        logger.warning("DB init skipped: %s", e)
+
+@app.on_event("startup")
+async def _warm_shared_clients():
+    await asyncio.to_thread(_warm_singletons)
+
+@app.on_event("shutdown")
+async def _close_shared_resources():
+    await close_jwks_http()
+    _close_actions_log()
+    _close_pdf_pool()
+    await list_cache.aclose()
 
 # ===========================================================
 # Tiny Rate Limit
@@ -194,17 +325,27 @@ async def add_security_headers(request, call_next):
 RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
 RATE_LIMIT_WINDOW_SEC = int(os.getenv("RATE_LIMIT_WINDOW_SEC", "60"))
 RATE_LIMIT_MAX_REQUESTS = int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "15"))
-_rate_log: Dict[str, List[float]] = {}
+RATE_LIMIT_GC_EVERY = 1000  # calls between sweeps of idle IP buckets
+_rate_log: Dict[str, Deque[float]] = {}
+_rate_calls = 0
+
+def _rate_log_gc(cutoff: float) -> None:
+    for ip in [ip for ip, b in _rate_log.items() if not b or b[-1] < cutoff]:
+        del _rate_log[ip]
 
 async def rate_limit(request: Request):
+    global _rate_calls
     if not RATE_LIMIT_ENABLED:
         return
     ip = request.client.host if request.client else "unknown"
-    now = time.time()
-    bucket = _rate_log.setdefault(ip, [])
+    now = time.monotonic()
     cutoff = now - RATE_LIMIT_WINDOW_SEC
+    _rate_calls += 1
+    if _rate_calls % RATE_LIMIT_GC_EVERY == 0:
+        _rate_log_gc(cutoff)
+    bucket = _rate_log.setdefault(ip, deque())
     while bucket and bucket[0] < cutoff:
-        bucket.pop(0)
+        bucket.popleft()
     if len(bucket) >= RATE_LIMIT_MAX_REQUESTS:
         raise HTTPException(status_code=429, detail="Too many requests, slow down.")
     bucket.append(now)
@@ -221,18 +362,21 @@ async def get_current_user(authorization: str = Header(None)) -> Dict[str, Any]:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing Bearer token")
     token = authorization.split(" ", 1)[1].strip()
-    return await verify_bearer(token)
+    return await verify_bearer_cached(token)
 
 def _is_admin(user: Dict[str, Any]) -> bool:
-    email = (user.get("email") or user.get("username") or "").lower()
-    if email and email in ADMIN_EMAILS:
-        return True
-    groups = user.get("cognito:groups") or user.get("groups") or []
+    if ADMIN_EMAILS:
+        email = (user.get("email") or user.get("username") or "").lower()
+        if email in ADMIN_EMAILS:
+            return True
+    if not ADMIN_GROUP:
+        return False
+    groups = user.get("cognito:groups") or user.get("groups")
+    if not groups:
+        return False
     if isinstance(groups, str):
-        groups = [groups]
-    if ADMIN_GROUP and ADMIN_GROUP in groups:
-        return True
-    return False
+        return groups == ADMIN_GROUP
+    return ADMIN_GROUP in groups
 
 async def get_admin_user(authorization: str = Header(None)) -> Dict[str, Any]:
     user = await get_current_user(authorization)
@@ -250,7 +394,7 @@ async def get_user_optional(authorization: str = Header(None)) -> Dict[str, Any]
     if COGNITO_ENABLED:
         if authorization and authorization.lower().startswith("bearer "):
             token = authorization.split(" ", 1)[1].strip()
-            return await verify_bearer(token)
+            return await verify_bearer_cached(token)
         if ALLOW_PUBLIC_ACTIONS:
             return {"sub": "public-demo", "email": "public@demo.local"}
         return {}
@@ -284,6 +428,8 @@ class AnalyzeResponse(BaseModel):
     client_insights: List[ClientInsight]
     meta: Optional[Dict[str, Any]] = None
     alerts: Optional[List[AlertItem]] = None  # <- server-side governance
+    # per-parse derived values; shared by every .copy() of a cached response
+    _memo: Dict[str, Any] = PrivateAttr(default_factory=dict)
 
 # ---- Enhanced recommendation schema (NEW) ----
 class RecommendJSONAction(BaseModel):
@@ -309,6 +455,13 @@ class RecommendResponse(BaseModel):
 class UploadAnalyzeResponse(AnalyzeResponse):
     stored_key: Optional[str] = None
 
+class UploadInitRequest(BaseModel):
+    filename: str
+    content_type: str = "text/csv"
+
+class UploadAnalyzeRequest(BaseModel):
+    key: str
+
 class ExecuteActionItem(BaseModel):
     title: str
     reason: Optional[str] = ""
@@ -355,22 +508,29 @@ def _float(v: Any) -> float:
     except Exception:
         return 0.0
 
-def _rows_from_text(csv_text: str) -> Tuple[List[Dict[str, Any]], List[str]]:
-    reader = csv.DictReader(io.StringIO(csv_text))
+def _sum_revenue_cost(rows: List[Dict[str, Any]]) -> Tuple[float, float]:
+    """Revenue and cost totals in a single pass over the rows."""
+    total_revenue = total_cost = 0.0
+    for r in rows:
+        total_revenue += _float(r.get("revenue"))
+        total_cost += _float(r.get("cost"))
+    return total_revenue, total_cost
+
+def _rows_from_lines(lines: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    reader = csv.DictReader(lines)
     rows = [r for r in reader]
     fields = [f.lower() for f in (reader.fieldnames or [])]
     return rows, fields
 
-def _analyze_text(csv_text: str) -> Tuple[List[Dict[str, Any]], AnalyzeResponse]:
-    rows, fieldnames = _rows_from_text(csv_text)
+def _analyze_lines(lines: Iterable[str]) -> Tuple[List[Dict[str, Any]], AnalyzeResponse]:
+    """Analyze CSV rows straight from a line stream (S3 body / open file)."""
+    rows, fieldnames = _rows_from_lines(lines)
     if not rows:
         raise HTTPException(status_code=400, detail="No rows found in CSV.")
     has_revenue_cost = ("revenue" in fieldnames) and ("cost" in fieldnames)
 
     if has_revenue_cost:
-        total_revenue = sum(_float(r.get("revenue")) for r in rows)
-        total_cost = sum(_float(r.get("cost")) for r in rows)
-        client_insights = analyze_csv_rows(rows)
+        client_insights, total_revenue, total_cost = analyze_csv_rows_with_totals(rows)
         return rows, AnalyzeResponse(
             total_revenue=round(total_revenue, 2),
             total_cost=round(total_cost, 2),
@@ -379,12 +539,15 @@ def _analyze_text(csv_text: str) -> Tuple[List[Dict[str, Any]], AnalyzeResponse]
         )
 
     # Fallback AWS-like schema
-    total_cost = sum(_float(r.get("Cost")) for r in rows if "Cost" in r)
-    total_revenue = total_cost
+    # one pass: grand total and per-service totals together
+    total_cost = 0.0
     by_service: Dict[str, float] = {}
     for r in rows:
+        c = _float(r.get("Cost"))
+        total_cost += c
         svc = r.get("Service") or r.get("UsageType") or "Unknown"
-        by_service[svc] = by_service.get(svc, 0.0) + _float(r.get("Cost"))
+        by_service[svc] = by_service.get(svc, 0.0) + c
+    total_revenue = total_cost
     client_insights2: List[ClientInsight] = []
     for svc, cst in sorted(by_service.items(), key=lambda kv: kv[1], reverse=True):
         client_insights2.append(ClientInsight(
@@ -398,18 +561,44 @@ def _analyze_text(csv_text: str) -> Tuple[List[Dict[str, Any]], AnalyzeResponse]
         client_insights=client_insights2,
     )
 
-def _summarize_for_prompt(rows: List[Dict[str, Any]], client_insights: List[ClientInsight]) -> str:
-    top_waste = sorted(client_insights, key=lambda c: c.license_waste_pct, reverse=True)[:3]
-    low_margin = sorted(client_insights, key=lambda c: c.margin)[:3]
+class _RecContext(NamedTuple):
+    top_waste: List[ClientInsight]
+    low_margin: List[ClientInsight]
+    sims: Dict[str, Dict[str, float]]
+    total_revenue: float
+    total_cost: float
+
+def _build_rec_context(
+    rows: List[Dict[str, Any]], client_insights: List[ClientInsight], recoverable_factor: float = 0.8
+) -> _RecContext:
+    """
+    Everything the recommendation flow needs from the insights, in one traversal:
+    top-3 waste / bottom-3 margin (bounded heaps) and per-client simulator entries.
+    """
+    insights = list(client_insights or [])
+    sims: Dict[str, Dict[str, float]] = {}
+    for c in insights:
+        entry = _sim_entry(c, recoverable_factor)
+        if entry:
+            sims[c.client] = entry
+    total_revenue, total_cost = _sum_revenue_cost(rows)
+    return _RecContext(
+        top_waste=heapq.nlargest(3, insights, key=lambda c: c.license_waste_pct),
+        low_margin=heapq.nsmallest(3, insights, key=lambda c: c.margin),
+        sims=sims,
+        total_revenue=total_revenue,
+        total_cost=total_cost,
+    )
+
+def _summarize_for_prompt(ctx: _RecContext) -> str:
     lines = []
     lines.append("Top license waste (3): " + "; ".join(
-        f"{c.client}({c.license_waste_pct:.1f}% waste)" for c in top_waste
+        f"{c.client}({c.license_waste_pct:.1f}% waste)" for c in ctx.top_waste
     ))
     lines.append("Lowest margins (3): " + "; ".join(
-        f"{c.client}(margin ${c.margin:.2f})" for c in low_margin
+        f"{c.client}(margin ${c.margin:.2f})" for c in ctx.low_margin
     ))
-    total_revenue = sum(_float(r.get("revenue")) for r in rows)
-    total_cost = sum(_float(r.get("cost")) for r in rows)
+    total_revenue, total_cost = ctx.total_revenue, ctx.total_cost
     lines.append(f"Totals: revenue=${total_revenue:.2f}, cost=${total_cost:.2f}, profit=${(total_revenue-total_cost):.2f}")
     return "\n".join(lines)
 
@@ -433,68 +622,147 @@ Return ONLY valid JSON (no prose, no code fences) with this schema:
 }
 """
 
+# constant prompt parts, built once; only the FACTS block varies per request
+_PROMPT_HEAD = (
+    "You are FinOps+ Assistant for MSPs. Use the data to output 3 prioritized, "
+    "actionable recommendations with savings & impact details.\n\n"
+    "FACTS:\n"
+)
+_PROMPT_TAIL = (
+    "\n\n"
+    "Rules:\n"
+    "- Think silently; OUTPUT ONLY JSON matching the schema.\n"
+    "- Provide realistic est_impact_usd and confidence(0..1).\n"
+    "- Fill current_cost/projected_cost if you can estimate; otherwise leave 0.\n\n"
+    f"{JSON_SCHEMA_HINT}\n"
+)
+
 def _build_grounded_prompt(context_text: str) -> str:
-    return (
-        "You are FinOps+ Assistant for MSPs. Use the data to output 3 prioritized, "
-        "actionable recommendations with savings & impact details.\n\n"
-        f"FACTS:\n{context_text}\n\n"
-        "Rules:\n"
-        "- Think silently; OUTPUT ONLY JSON matching the schema.\n"
-        "- Provide realistic est_impact_usd and confidence(0..1).\n"
-        "- Fill current_cost/projected_cost if you can estimate; otherwise leave 0.\n\n"
-        f"{JSON_SCHEMA_HINT}\n"
-    )
+    return _PROMPT_HEAD + context_text + _PROMPT_TAIL
+
+_JSON_FENCE_RE = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
 
 def _extract_json(s: str) -> Dict[str, Any]:
     try:
-        return json.loads(s)
+        return _json_loads(s)
     except Exception:
         pass
-    m = re.search(r"```json\s*(\{.*?\})\s*```", s, flags=re.DOTALL | re.IGNORECASE)
+    m = _JSON_FENCE_RE.search(s)
     if m:
         try:
-            return json.loads(m.group(1))
+            return _json_loads(m.group(1))
         except Exception:
             pass
     i = s.find("{")
     j = s.rfind("}")
     if i != -1 and j != -1 and j > i:
         try:
-            return json.loads(s[i:j+1])
+            return _json_loads(s[i:j+1])
         except Exception:
             pass
     raise ValueError("No valid JSON found in model output")
 
-def _read_billing_csv_text(force_source: Optional[str] = None) -> str:
-    csv_text: Optional[str] = None
+def _iter_stream_lines(stream) -> Iterator[str]:
+    with stream:
+        yield from stream
+
+def _iter_local_lines(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        yield from f
+
+# ---- Parsed-CSV cache ----
+# (bucket, key) -> (etag, rows, ar). Revalidation is a conditional GET
+# (If-None-Match): a 304 carries no body, and a changed object is re-read at
+# once. Local files are keyed on (mtime, size). Callers get a shallow copy of
+# the AnalyzeResponse because _attach_alerts/_attach_meta assign onto it;
+# rows are shared and treated as read-only.
+class _VersionedLRU:
+    """Thread-safe LRU of key -> (version, value); callers compare the version."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Tuple[Any, Any]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+            return hit
+
+    def put(self, key: Any, version: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+ANALYZE_CACHE_SIZE = int(os.getenv("ANALYZE_CACHE_SIZE", "64"))
+_analyze_cache = _VersionedLRU(ANALYZE_CACHE_SIZE)
+
+def _analyze_s3_object(bucket: str, key: str) -> Optional[Tuple[List[Dict[str, Any]], AnalyzeResponse]]:
+    """Parse an S3 CSV, reusing the cached parse while its ETag is unchanged. None if unreadable."""
+    src = (bucket, key)
+    hit = _analyze_cache.get(src)
+    stream, etag = open_s3_text_with_etag(bucket, key, if_none_match=hit[0] if hit else None)
+    if stream is None:
+        if hit is not None and etag == hit[0]:
+            rows, ar = hit[1]
+            return rows, ar.copy()
+        return None
+    rows, ar = _analyze_lines(_iter_stream_lines(stream))
+    if etag:
+        _analyze_cache.put(src, etag, (rows, ar))
+    return rows, ar.copy()
+
+def _analyze_local_file(path: str) -> Tuple[List[Dict[str, Any]], AnalyzeResponse]:
+    st = os.stat(path)
+    tag = f"{st.st_mtime_ns}:{st.st_size}"
+    src = ("file", path)
+    hit = _analyze_cache.get(src)
+    if hit is not None and hit[0] == tag:
+        rows, ar = hit[1]
+        return rows, ar.copy()
+    rows, ar = _analyze_lines(_iter_local_lines(path))
+    _analyze_cache.put(src, tag, (rows, ar))
+    return rows, ar.copy()
+
+def _analyze_billing_csv(force_source: Optional[str] = None) -> Tuple[List[Dict[str, Any]], AnalyzeResponse]:
+    """
+    Rows + AnalyzeResponse for the current billing CSV (S3, falling back to the
+    local file), served from the parsed-CSV cache while the source is unchanged.
+    """
     if force_source != "local" and use_s3():
         bucket = os.environ.get("S3_BUCKET")
         key = os.environ.get("S3_KEY", "billing_data.csv")
         logger.info("Reading billing CSV from S3: %s/%s", bucket, key)
-        csv_text = read_s3_file(bucket, key)
-        if csv_text is None:
-            logger.warning("S3 read failed; falling back to local file.")
-
-    if csv_text is None:
-        local_path = os.path.join(os.path.dirname(__file__), "data", "billing_data.csv")
-        logger.info("Reading billing CSV from local file: %s", local_path)
-        if not os.path.exists(local_path):
-            raise HTTPException(status_code=404, detail="Billing data not found (S3 failed and local missing).")
-        with open(local_path, "r", encoding="utf-8") as f:
-            csv_text = f.read()
-    return csv_text
-
-def _read_history_csv_text(key: str) -> str:
+        out = _analyze_s3_object(bucket, key)
+        if out is not None:
+            return out
+        logger.warning("S3 read failed; falling back to local file.")
+
+    local_path = os.path.join(os.path.dirname(__file__), "data", "billing_data.csv")
+    logger.info("Reading billing CSV from local file: %s", local_path)
+    if not os.path.exists(local_path):
+        raise HTTPException(status_code=404, detail="Billing data not found (S3 failed and local missing).")
+    return _analyze_local_file(local_path)
+
+def _analyze_history_key(key: str) -> Tuple[List[Dict[str, Any]], AnalyzeResponse]:
     if not key:
         raise HTTPException(status_code=400, detail="key is required")
     if not use_s3():
         raise HTTPException(status_code=400, detail="S3 not configured")
     bucket = os.environ.get("S3_BUCKET")
     logger.info("Reading S3 historical file: %s/%s", bucket, key)
-    csv_text = read_s3_file(bucket, key)
-    if csv_text is None:
+    out = _analyze_s3_object(bucket, key)
+    if out is None:
         raise HTTPException(status_code=404, detail="Historical key not found")
-    return csv_text
+    return out
 
 def _key_allowed_for_user(key: str, user_sub: str, prefix: str) -> bool:
     if not key or not user_sub:
@@ -504,37 +772,86 @@ def _key_allowed_for_user(key: str, user_sub: str, prefix: str) -> bool:
     expected_prefix = f"{prefix}{user_sub}/"
     return key.startswith(expected_prefix)
 
-def _decode_csv_bytes(upload_bytes: bytes) -> Tuple[str, str]:
-    attempts = ["utf-8", "utf-8-sig", "cp1252", "latin-1"]
+def _upload_key(prefix: str, sub: str, filename: Optional[str]) -> str:
+    ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    safe_name = os.path.basename(filename or "upload.csv")
+    return f"{prefix}{sub}/{ts}_{safe_name}"
+
+def _analyze_upload_file(fobj: BinaryIO) -> Tuple[List[Dict[str, Any]], AnalyzeResponse, str]:
+    """
+    Decode + analyze an uploaded CSV straight off its (spooled) file object,
+    one encoding at a time; a decode error rewinds and retries with the next.
+    """
+    fobj.seek(0)
+    # BOM sniff first so the common cases decode exactly once
+    if fobj.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+        attempts = ["utf-8-sig"]
+    else:
+        attempts = ["utf-8", "cp1252", "latin-1"]
     last_err = None
     for enc in attempts:
+        fobj.seek(0)
+        # newline="" keeps \r\n / bare \r intact for the csv module to handle
+        text = io.TextIOWrapper(fobj, encoding=enc, newline="")
         try:
-            text = upload_bytes.decode(enc)
-            text = text.replace("\r\n", "\n").replace("\r", "\n")
-            return text, enc
+            rows, ar = _analyze_lines(text)
+            return rows, ar, enc
         except UnicodeDecodeError as e:
             last_err = e
             continue
+        finally:
+            text.detach()  # leave the upload's file object open
     logger.error("Upload decode failed; tried encodings=%s; error=%s", attempts, last_err)
     raise HTTPException(status_code=400, detail="Invalid encoding: please upload UTF-8/UTF-8-BOM/Latin-1 CSV.")
 
 def _attach_meta(ar: "AnalyzeResponse", meta: Dict[str, Any]) -> "AnalyzeResponse":
-    try:
-        ar.meta = meta
-        return ar
-    except Exception:
-        data = ar.dict()
-        data["meta"] = meta
-        return AnalyzeResponse(**data)
+    ar.meta = meta
+    return ar
 
 ACTIONS_LOG_PATH = os.path.join(os.path.dirname(__file__), "data", "actions_log.jsonl")
 DDB_TABLE = os.getenv("DDB_TABLE", "").strip()
 
+# One long-lived O_APPEND descriptor for the JSONL fallback: each event is a
+# single write() (atomic for appenders), no makedirs/open/close per call.
+_actions_log_fd: Optional[int] = None
+_actions_log_lock = threading.Lock()
+
+def _actions_log_append(line: bytes) -> None:
+    global _actions_log_fd
+    if _actions_log_fd is None:
+        with _actions_log_lock:
+            if _actions_log_fd is None:
+                os.makedirs(os.path.dirname(ACTIONS_LOG_PATH), exist_ok=True)
+                _actions_log_fd = os.open(ACTIONS_LOG_PATH, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    os.write(_actions_log_fd, line)
+
+def _close_actions_log() -> None:
+    global _actions_log_fd
+    with _actions_log_lock:
+        if _actions_log_fd is not None:
+            os.close(_actions_log_fd)
+            _actions_log_fd = None
+
+def _float_to_ddb(f: float) -> Decimal:
+    # repr() is the shortest round-tripping form; DynamoDB rejects NaN/inf
+    return Decimal(repr(f)) if math.isfinite(f) else Decimal(0)
+
+# exact-type dispatch (one dict lookup per node instead of an isinstance chain)
+_DDB_DISPATCH = {
+    float: _float_to_ddb,
+    int: Decimal,
+    bool: Decimal,
+    dict: lambda d: {k: _to_ddb(v) for k, v in d.items()},
+    list: lambda l: [_to_ddb(v) for v in l],
+}
+
 def _to_ddb(obj: Any) -> Any:
+    conv = _DDB_DISPATCH.get(type(obj))
+    if conv is not None:
+        return conv(obj)
+    # subclasses (OrderedDict, IntEnum, ...) take the slow path
     if isinstance(obj, float):
-        if math.isfinite(obj):
-            return Decimal(str(obj))
-        return Decimal(0)
+        return _float_to_ddb(obj)
     if isinstance(obj, int):
         return Decimal(obj)
     if isinstance(obj, dict):
@@ -556,9 +873,7 @@ def _persist_action_event(event: Dict[str, Any]) -> Tuple[bool, str, str]:
         except Exception:
             logger.exception("DDB persist failed; will fallback to file")
     try:
-        os.makedirs(os.path.dirname(ACTIONS_LOG_PATH), exist_ok=True)
-        with open(ACTIONS_LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event) + "\n")
+        _actions_log_append(_json_line(event))
         return True, f"file:{ACTIONS_LOG_PATH}", event_id
     except Exception:
         logger.exception("file persist failed")
@@ -610,25 +925,6 @@ def _rule_based_actions(ar: "AnalyzeResponse") -> Dict[str, Any]:
     return {"actions": actions}
 
 # ---- Cost-weighted waste & simulator (Unified) ----
-def _weighted_avg_waste(clients: List[ClientInsight]) -> float:
-    """
-    Returns a cost-weighted average of license_waste_pct across clients.
-    Expects license_waste_pct already expressed as a percent (0..100).
-    """
-    if not clients:
-        return 0.0
-    total_cost = 0.0
-    weighted = 0.0
-    for c in clients:
-        cost = float(_get(c, "cost", 0.0) or 0.0)
-        waste_pct = float(_get(c, "license_waste_pct", 0.0) or 0.0)
-        if cost > 0:
-            total_cost += cost
-            weighted += cost * waste_pct
-    if total_cost <= 0:
-        return 0.0
-    return weighted / total_cost  # still in percent (0..100)
-
 def _rightsizing_simulator(ar: "AnalyzeResponse", recoverable_factor: float = 0.8) -> Dict[str, Dict[str, float]]:
     """
     Very simple simulator: potential savings = cost * (waste_pct/100) * recoverable_factor.
@@ -636,20 +932,47 @@ def _rightsizing_simulator(ar: "AnalyzeResponse", recoverable_factor: float = 0.
     """
     out: Dict[str, Dict[str, float]] = {}
     for c in ar.client_insights or []:
-        cost = float(c.cost or 0.0)
-        waste_pct = float(c.license_waste_pct or 0.0) / 100.0
-        if cost <= 0 or waste_pct <= 0:
-            continue
-        savings = max(0.0, cost * waste_pct * recoverable_factor)
-        projected = max(0.0, cost - savings)
-        out[c.client] = {
-            "savings_usd": round(savings, 2),
-            "current_cost": round(cost, 2),
-            "projected_cost": round(projected, 2),
-        }
+        entry = _sim_entry(c, recoverable_factor)
+        if entry:
+            out[c.client] = entry
     return out
 
-def _detect_anomalies_llm(rows: List[Dict[str, Any]], ar: AnalyzeResponse, max_find: int = 3):
+def _benchmark_stats(ar: AnalyzeResponse, recoverable_factor: float = 0.8) -> Tuple[float, float]:
+    """
+    (cost-weighted license_waste_pct, simulator savings total) in one pass over
+    the clients, computed once per parsed dataset. Waste stays in percent (0..100);
+    savings match the sum of _rightsizing_simulator's per-client savings_usd.
+    """
+    memo_key = ("benchmark", recoverable_factor)
+    stats = ar._memo.get(memo_key)
+    if stats is None:
+        total_cost = weighted = savings = 0.0
+        for c in ar.client_insights or ():
+            cost = float(c.cost or 0.0)
+            if cost <= 0:
+                continue
+            waste = float(c.license_waste_pct or 0.0)
+            total_cost += cost
+            weighted += cost * waste
+            if waste > 0:
+                savings += round(cost * (waste / 100.0) * recoverable_factor, 2)
+        stats = ar._memo[memo_key] = (weighted / total_cost if total_cost > 0 else 0.0, savings)
+    return stats
+
+def _sim_entry(c: ClientInsight, recoverable_factor: float) -> Optional[Dict[str, float]]:
+    cost = float(c.cost or 0.0)
+    waste_pct = float(c.license_waste_pct or 0.0) / 100.0
+    if cost <= 0 or waste_pct <= 0:
+        return None
+    savings = max(0.0, cost * waste_pct * recoverable_factor)
+    projected = max(0.0, cost - savings)
+    return {
+        "savings_usd": round(savings, 2),
+        "current_cost": round(cost, 2),
+        "projected_cost": round(projected, 2),
+    }
+
+async def _detect_anomalies_llm(rows: List[Dict[str, Any]], ar: AnalyzeResponse, max_find: int = 3):
     """
     LLM-driven anomaly pass (Claude Sonnet via Bedrock). Flags spikes and outputs action-like items.
     Falls back gracefully on failure.
@@ -673,7 +996,7 @@ def _detect_anomalies_llm(rows: List[Dict[str, Any]], ar: AnalyzeResponse, max_f
             "\"confidence\": 0.75, "
             "\"risk\": \"medium\" } ] }"
         )
-        parsed, source = get_ai_json(prompt, max_tokens=500, retries=1)
+        parsed, source = await get_ai_json_async(prompt, max_tokens=500, retries=1)
         if parsed and isinstance(parsed, dict) and parsed.get("actions"):
             parsed["actions"] = parsed["actions"][:max_find]
             return parsed
@@ -683,24 +1006,27 @@ def _detect_anomalies_llm(rows: List[Dict[str, Any]], ar: AnalyzeResponse, max_f
 
 # ---- Updated plan→recommendation stitcher (NEW) ----
 async def _recommend_from_rows(rows, ar: "AnalyzeResponse"):
-    # 1) LLM grounded recos
-    context_text = _summarize_for_prompt(rows, ar.client_insights)
+    # 1) LLM grounded recos (and the anomaly pass, concurrently: independent Bedrock calls)
+    ctx = _build_rec_context(rows, ar.client_insights, recoverable_factor=0.8)
+    context_text = _summarize_for_prompt(ctx)
     prompt = _build_grounded_prompt(context_text)
-    parsed, source = get_ai_json(prompt, max_tokens=700, retries=1)
+    (parsed, source), anomalies = await asyncio.gather(
+        get_ai_json_async(prompt, max_tokens=700, retries=1),
+        _detect_anomalies_llm(rows, ar),
+    )
     if not (parsed and isinstance(parsed, dict) and "actions" in parsed):
         parsed = _rule_based_actions(ar)
         source = "rule-fallback"
 
-    # 2) LLM anomaly pass (adds extra actions)
+    # 2) Merge anomaly-pass actions
     try:
-        anomalies = _detect_anomalies_llm(rows, ar)
         if anomalies.get("actions"):
             parsed["actions"].extend(anomalies["actions"])
     except Exception:
         pass
 
-    # 3) Right-sizing simulator — attach numbers per target
-    sims = _rightsizing_simulator(ar, recoverable_factor=0.8)
+    # 3) Right-sizing simulator (computed with the prompt context) — attach numbers per target
+    sims = ctx.sims
 
     for a in parsed.get("actions", []):
         a.setdefault("targets", [])
@@ -729,18 +1055,39 @@ async def _recommend_from_rows(rows, ar: "AnalyzeResponse"):
 # ===========================================================
 # Budgets storage helpers (S3 or local) with tenant support
 # ===========================================================
+# path separators (and NUL) in a tenant id become "_"
+_TENANT_TRANS = str.maketrans({"/": "_", "\\": "_", "\x00": "_"})
+
 def _tenant_or_default(q_tenant: Optional[str]) -> str:
     if not BUDGETS_TENANTED:
         return ""  # single-tenant mode path (no tenant segment)
+    return _sanitize_tenant(q_tenant)
+
+# a handful of distinct tenants in practice; bounded since the value is client-supplied
+@lru_cache(maxsize=256)
+def _sanitize_tenant(q_tenant: Optional[str]) -> str:
     t = (q_tenant or BUDGETS_TENANT_DEFAULT or "default").strip()
-    t = t.replace("..", "_").replace("/", "_")
-    return t
+    if ".." in t:
+        t = t.replace("..", "_")
+    return t.translate(_TENANT_TRANS)
+
+# directories already created by this process; reads never create directories
+_ensured_dirs: set = set()
+_ensured_dirs_lock = threading.Lock()
 
-def _budgets_local_path(sub: str, tenant: Optional[str]) -> str:
+def _ensure_dir(path: str) -> None:
+    if path in _ensured_dirs:
+        return
+    with _ensured_dirs_lock:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+def _budgets_local_path(sub: str, tenant: Optional[str], create: bool = False) -> str:
     base = os.path.join(os.path.dirname(__file__), "data", "budgets")
     if BUDGETS_TENANTED:
         base = os.path.join(base, _tenant_or_default(tenant))
-    os.makedirs(base, exist_ok=True)
+    if create:
+        _ensure_dir(base)
     return os.path.join(base, f"{sub}.json")
 
 def _s3_budgets_key(sub: str, tenant: Optional[str]) -> str:
@@ -748,56 +1095,113 @@ def _s3_budgets_key(sub: str, tenant: Optional[str]) -> str:
         return f"{S3_BUDGETS_PREFIX}{_tenant_or_default(tenant)}/{sub}.json"
     return f"{S3_BUDGETS_PREFIX}{sub}.json"
 
+_INF = (math.inf, -math.inf)
+_FLOAT_MAX = sys.float_info.max
+
 def _is_valid_number(v: Any) -> bool:
+    # floats/ints straight from JSON skip the float() + exception setup
+    if type(v) is float:
+        return v == v and v not in _INF
+    if type(v) is int:
+        return -_FLOAT_MAX <= v <= _FLOAT_MAX
     try:
         x = float(v)
-        return math.isfinite(x)
+        return x == x and x not in _INF
     except Exception:
         return False
 
-def _load_budgets_for_user(sub: str, tenant: Optional[str]) -> Dict[str, float]:
+# Parsed budgets cached per backing object version (S3 ETag via conditional GET,
+# local (mtime, size)), handed out as read-only views; saves invalidate.
+BUDGETS_CACHE_SIZE = int(os.getenv("BUDGETS_CACHE_SIZE", "1024"))
+_budgets_cache = _VersionedLRU(BUDGETS_CACHE_SIZE)
+_EMPTY_BUDGETS: Mapping[str, float] = MappingProxyType({})
+
+def _parse_budgets(txt: str) -> Mapping[str, float]:
+    obj = _json_loads(txt) if txt else None
+    if not isinstance(obj, dict):
+        return _EMPTY_BUDGETS
+    return MappingProxyType({str(k): float(v) for k, v in obj.items() if _is_valid_number(v)})
+
+def _load_budgets_for_user(sub: str, tenant: Optional[str]) -> Mapping[str, float]:
     if not sub:
-        return {}
+        return _EMPTY_BUDGETS
     if use_s3():
         bucket = os.environ.get("S3_BUCKET")
         key = _s3_budgets_key(sub, tenant)
-        txt = read_s3_file(bucket, key)
-        if txt:
-            try:
-                obj = json.loads(txt)
-                if isinstance(obj, dict):
-                    return {str(k): float(v) for k, v in obj.items() if _is_valid_number(v)}
-            except Exception:
-                logger.warning("Failed to parse S3 budgets JSON for sub=%s", sub)
-        return {}
-    path = _budgets_local_path(sub, tenant)
-    if os.path.exists(path):
+        hit = _budgets_cache.get(("s3", key))
+        stream, etag = open_s3_text_with_etag(bucket, key, if_none_match=hit[0] if hit else None)
+        if stream is None:
+            return hit[1] if hit is not None and etag == hit[0] else _EMPTY_BUDGETS
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                obj = json.load(f)
-                if isinstance(obj, dict):
-                    return {str(k): float(v) for k, v in obj.items() if _is_valid_number(v)}
+            with stream:
+                budgets = _parse_budgets(stream.read())
         except Exception:
-            logger.warning("Failed to read local budgets JSON for sub=%s", sub)
-    return {}
+            logger.warning("Failed to parse S3 budgets JSON for sub=%s", sub)
+            budgets = _EMPTY_BUDGETS
+        if etag:
+            _budgets_cache.put(("s3", key), etag, budgets)
+        return budgets
+    path = _budgets_local_path(sub, tenant)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return _EMPTY_BUDGETS
+    version = (st.st_mtime_ns, st.st_size)
+    hit = _budgets_cache.get(("file", path))
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            budgets = _parse_budgets(f.read())
+    except Exception:
+        logger.warning("Failed to read local budgets JSON for sub=%s", sub)
+        return _EMPTY_BUDGETS
+    _budgets_cache.put(("file", path), version, budgets)
+    return budgets
+
+# Bounded fan-out for per-user S3 reads (admin budget listing): GETs overlap
+# in worker threads instead of stacking serially on the event loop.
+S3_FANOUT_CONCURRENCY = int(os.getenv("S3_FANOUT_CONCURRENCY", "8"))
+
+async def _load_budgets_many(subs: List[str], tenant: Optional[str]) -> Dict[str, Mapping[str, float]]:
+    sem = asyncio.Semaphore(S3_FANOUT_CONCURRENCY)
+
+    async def _one(sub: str) -> Mapping[str, float]:
+        async with sem:
+            return await asyncio.to_thread(_load_budgets_for_user, sub, tenant)
+
+    results = await asyncio.gather(*(_one(s) for s in subs))
+    return dict(zip(subs, results))
 
 def _save_budgets_for_user(sub: str, budgets: Dict[str, float], tenant: Optional[str]) -> bool:
     if not sub:
         return False
     cleaned = {str(k): max(0.0, float(v)) for k, v in (budgets or {}).items() if _is_valid_number(v)}
-    payload_txt = json.dumps(cleaned)
+    payload = _json_bytes(cleaned)
     if use_s3():
         bucket = os.environ.get("S3_BUCKET")
         key = _s3_budgets_key(sub, tenant)
-        ok = put_s3_object(bucket, key, payload_txt.encode("utf-8"), content_type="application/json")
+        ok = put_s3_object(bucket, key, payload, content_type="application/json")
+        _budgets_cache.pop(("s3", key))
         if ok:
             logger.info("Saved budgets to s3://%s/%s", bucket, key)
             return True
         logger.warning("Failed to put budgets to S3; will attempt local fallback")
     try:
-        path = _budgets_local_path(sub, tenant)
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(payload_txt)
+        path = _budgets_local_path(sub, tenant, create=True)
+        # write-then-rename so concurrent loads never see a half-written file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+        _budgets_cache.pop(("file", path))
         logger.info("Saved budgets to local file: %s", path)
         return True
     except Exception:
@@ -805,59 +1209,69 @@ def _save_budgets_for_user(sub: str, budgets: Dict[str, float], tenant: Optional
         return False
 
 def _list_budgets_users(tenant: Optional[str]) -> List[str]:
-    users: List[str] = []
     if use_s3():
         bucket = os.environ.get("S3_BUCKET")
         prefix = S3_BUDGETS_PREFIX
         if BUDGETS_TENANTED:
             prefix = f"{S3_BUDGETS_PREFIX}{_tenant_or_default(tenant)}/"
-        objs = list_s3_objects(bucket, prefix, max_keys=1000)
-        for o in objs:
-            key = o.get("key") or o.get("Key") or ""
-            if key.endswith(".json"):
-                name = os.path.basename(key)[:-5]
-                if name:
-                    users.append(name)
-        return sorted(list(set(users)))
+        names = {k.rpartition("/")[2][:-5] for k in list_s3_keys(bucket, prefix) if k.endswith(".json")}
+        names.discard("")
+        return sorted(names)
     base = os.path.join(os.path.dirname(__file__), "data", "budgets")
     if BUDGETS_TENANTED:
         base = os.path.join(base, _tenant_or_default(tenant))
-    if not os.path.isdir(base):
+    try:
+        with os.scandir(base) as it:
+            users = [e.name[:-5] for e in it if e.name.endswith(".json") and e.is_file()]
+    except OSError:
         return []
-    for fn in os.listdir(base):
-        if fn.endswith(".json"):
-            users.append(fn[:-5])
-    return sorted(list(set(users)))
+    return sorted(users)
 
 # ===========================================================
 # Alerts (server-side governance)
 # ===========================================================
+def _normalize_budgets(budgets: Optional[Mapping[str, Any]]) -> Dict[str, float]:
+    """Budgets as plain floats, keeping only valid positive amounts."""
+    out: Dict[str, float] = {}
+    for k, v in (budgets or {}).items():
+        if _is_valid_number(v):
+            b = float(v)
+            if b > 0:
+                out[k] = b
+    return out
+
 def _compute_alerts(client_insights: List[ClientInsight], budgets: Dict[str, float],
                     warn_pct: float = ALERT_WARN_PCT, breach_pct: float = ALERT_BREACH_PCT) -> List[AlertItem]:
+    # budgets must come from _normalize_budgets (positive floats only)
     out: List[AlertItem] = []
-    budgets = budgets or {}
-    for c in client_insights or []:
-        b = float(budgets.get(c.client, 0) or 0)
-        if b <= 0:
+    if not budgets:
+        return out
+    budget_for = budgets.get
+    for c in client_insights or ():
+        b = budget_for(c.client)
+        if b is None:
             continue
         spend = float(c.cost or 0)
-        pct = (spend / b) if b > 0 else 0.0
-        status = "ok"
+        pct = spend / b
         if pct >= breach_pct:
             status = "breach"
         elif pct >= warn_pct:
             status = "warn"
-        out.append(AlertItem(client=c.client, budget=b, spend=spend, pct=round(pct * 100.0, 1), status=status))
+        else:
+            status = "ok"
+        # pct unrounded: the PDF and dashboard format it to 1 dp on render
+        out.append(AlertItem(client=c.client, budget=b, spend=spend, pct=pct * 100.0, status=status))
     return out
 
-def _attach_alerts(ar: AnalyzeResponse, budgets: Dict[str, float]) -> AnalyzeResponse:
-    try:
-        ar.alerts = _compute_alerts(ar.client_insights, budgets)
+def _attach_alerts(ar: AnalyzeResponse, budgets: Mapping[str, Any]) -> AnalyzeResponse:
+    budgets = _normalize_budgets(budgets) if budgets else None
+    if not budgets:
+        # no budgets configured (the usual case): nothing to compute
+        ar.alerts = []
         return ar
-    except Exception:
-        data = ar.dict()
-        data["alerts"] = [a.dict() for a in _compute_alerts(ar.client_insights, budgets)]
-        return AnalyzeResponse(**data)
+    # AnalyzeResponse is mutable; assign in place rather than rebuilding via .dict()
+    ar.alerts = _compute_alerts(ar.client_insights, budgets)
+    return ar
 
 # ===========================================================
 # PDF helpers
@@ -866,6 +1280,16 @@ _styles = getSampleStyleSheet()
 _styles.add(ParagraphStyle(name="KPIHeading", fontName="Helvetica-Bold", fontSize=11, textColor=colors.HexColor("#111827")))
 _styles.add(ParagraphStyle(name="SmallNote", fontName="Helvetica", fontSize=8, textColor=colors.HexColor("#6B7280")))
 
+@lru_cache(maxsize=8)
+def _logo_reader(path: str) -> Optional[ImageReader]:
+    """Parsed logo image, read from disk once per process (None if missing/unreadable)."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return ImageReader(path)
+    except Exception:
+        return None
+
 def _money(n):
     try:
         v = float(n)
@@ -880,30 +1304,36 @@ def _pct(n):
     except Exception:
         return "—"
 
+# page-chrome colours, parsed once (drawn on every page)
+_C_INK = colors.HexColor("#111827")
+_C_INK_SOFT = colors.HexColor("#374151")
+_C_MUTED = colors.HexColor("#6B7280")
+_C_BRAND = colors.HexColor("#1D4ED8")
+
 def _header_footer(canvas, doc):
     """Header/Footer for content pages (not used on cover)."""
     canvas.saveState()
     w, h = A4
 
     # Header left: brand; right: timestamp
-    if os.path.exists(PDF_LOGO_PATH):
+    img = _logo_reader(PDF_LOGO_PATH)
+    if img is not None:
         try:
-            img = ImageReader(PDF_LOGO_PATH)
             canvas.drawImage(img, 1.2*cm, h - 2.0*cm, width=1.2*cm, height=1.2*cm, mask='auto')
         except Exception:
             pass
 
     canvas.setFont("Helvetica-Bold", 11)
-    canvas.setFillColor(colors.HexColor("#111827"))
+    canvas.setFillColor(_C_INK)
     canvas.drawString(2.7*cm, h - 1.2*cm, PDF_BRAND)
 
     canvas.setFont("Helvetica", 8.5)
-    canvas.setFillColor(colors.HexColor("#6B7280"))
+    canvas.setFillColor(_C_MUTED)
     canvas.drawRightString(w - 1.2*cm, h - 1.2*cm, datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"))
 
     # Footer: page number
     canvas.setFont("Helvetica", 8.5)
-    canvas.setFillColor(colors.HexColor("#6B7280"))
+    canvas.setFillColor(_C_MUTED)
     canvas.drawRightString(w - 1.2*cm, 1.2*cm, f"Page {doc.page}")
     canvas.restoreState()
 
@@ -924,32 +1354,43 @@ def _draw_cover(canvas, brand: str, tagline: str, logo_path: str):
     canvas.saveState()
 
     # top subtle bar
-    canvas.setFillColor(colors.HexColor("#1D4ED8"))
+    canvas.setFillColor(_C_BRAND)
     canvas.rect(0, h - 2.2*cm, w, 2.2*cm, fill=1, stroke=0)
 
     # brand group
-    if os.path.exists(logo_path):
+    img = _logo_reader(logo_path)
+    if img is not None:
         try:
-            img = ImageReader(logo_path)
             canvas.drawImage(img, w/2 - 32, h - 1.8*cm, width=18, height=18, mask='auto')
         except Exception:
             pass
 
     # Title stack
-    canvas.setFillColor(colors.HexColor("#111827"))
+    canvas.setFillColor(_C_INK)
     canvas.setFont("Helvetica-Bold", 22)
     canvas.drawCentredString(w/2, h - 4.0*cm, f"{brand} — Executive Report")
 
     canvas.setFont("Helvetica", 11)
-    canvas.setFillColor(colors.HexColor("#374151"))
+    canvas.setFillColor(_C_INK_SOFT)
     canvas.drawCentredString(w/2, h - 4.9*cm, "AWS + Kiros | Hackathon Prototype")
 
-    canvas.setFillColor(colors.HexColor("#6B7280"))
+    canvas.setFillColor(_C_MUTED)
     canvas.setFont("Helvetica", 9)
     canvas.drawCentredString(w/2, h - 5.7*cm, datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"))
 
     canvas.restoreState()
 
+_KPI_TABLE_STYLE = TableStyle([
+    ("FONTNAME", (0,0), (-1,-1), "Helvetica"),
+    ("FONTSIZE", (0,0), (-1,-1), 10),
+    ("ALIGN", (1,0), (1,-1), "RIGHT"),
+    ("LINEBELOW", (0,0), (-1,0), 0.6, colors.HexColor("#D1D5DB")),
+    ("ROWBACKGROUNDS", (0,0), (-1,-1), [colors.HexColor("#FFFFFF"), colors.HexColor("#F9FAFB")]),
+    ("BOX", (0,0), (-1,-1), 0.6, colors.HexColor("#D1D5DB")),
+    ("INNERGRID", (0,0), (-1,-1), 0.3, colors.HexColor("#E5E7EB")),
+    ("FONTNAME", (0,0), (0,-1), "Helvetica-Bold"),
+])
+
 def _kpi_table(ar):
     kpi_data = [
         ["Total Revenue", _money(ar.total_revenue)],
@@ -957,26 +1398,36 @@ def _kpi_table(ar):
         ["Total Profit", _money(ar.total_profit)],
     ]
     t = Table(kpi_data, colWidths=[6.0*cm, 8.0*cm])
-    t.setStyle(TableStyle([
-        ("FONTNAME", (0,0), (-1,-1), "Helvetica"),
-        ("FONTSIZE", (0,0), (-1,-1), 10),
-        ("ALIGN", (1,0), (1,-1), "RIGHT"),
-        ("LINEBELOW", (0,0), (-1,0), 0.6, colors.HexColor("#D1D5DB")),
-        ("ROWBACKGROUNDS", (0,0), (-1,-1), [colors.HexColor("#FFFFFF"), colors.HexColor("#F9FAFB")]),
-        ("BOX", (0,0), (-1,-1), 0.6, colors.HexColor("#D1D5DB")),
-        ("INNERGRID", (0,0), (-1,-1), 0.3, colors.HexColor("#E5E7EB")),
-        ("FONTNAME", (0,0), (0,-1), "Helvetica-Bold"),
-    ]))
+    t.setStyle(_KPI_TABLE_STYLE)
     return t
 
+_CLIENTS_TABLE_STYLE = TableStyle([
+    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+    ("FONTSIZE", (0,0), (-1,0), 10),
+    ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#F3F4F6")),
+    ("TEXTCOLOR", (0,0), (-1,0), colors.HexColor("#111827")),
+
+    ("FONTNAME", (0,1), (-1,-1), "Helvetica"),
+    ("FONTSIZE", (0,1), (-1,-1), 9.5),
+    ("ALIGN", (1,1), (5,-1), "RIGHT"),
+    ("ALIGN", (6,1), (6,-1), "CENTER"),
+
+    ("ROWBACKGROUNDS", (0,1), (-1,-1), [colors.white, colors.HexColor("#FAFAFA")]),
+    ("GRID", (0,0), (-1,-1), 0.25, colors.HexColor("#E5E7EB")),
+    ("BOX", (0,0), (-1,-1), 0.4, colors.HexColor("#D1D5DB")),
+    ("TOPPADDING", (0,0), (-1,-1), 4),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 4),
+])
+
 def _clients_table(ar, budgets):
+    # budgets: output of _normalize_budgets, so every present value is > 0
     header = ["Client", "Revenue", "Cost", "Margin", "Waste %", "Budget", "Status"]
     rows = [header]
-    budgets = budgets or {}
+    budget_for = (budgets or {}).get
     alerts_map = {a.client: a for a in (ar.alerts or [])}
 
     for c in ar.client_insights:
-        b = budgets.get(c.client, 0.0) or 0.0
+        b = budget_for(c.client, 0.0)
         a = alerts_map.get(c.client)
         status = a.status.upper() if a else ("OK" if b > 0 else "—")
         rows.append([
@@ -985,25 +1436,27 @@ def _clients_table(ar, budgets):
         ])
 
     t = Table(rows, colWidths=[4.0*cm, 2.4*cm, 2.4*cm, 2.4*cm, 2.2*cm, 2.6*cm, 2.0*cm])
-    t.setStyle(TableStyle([
-        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-        ("FONTSIZE", (0,0), (-1,0), 10),
-        ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#F3F4F6")),
-        ("TEXTCOLOR", (0,0), (-1,0), colors.HexColor("#111827")),
-
-        ("FONTNAME", (0,1), (-1,-1), "Helvetica"),
-        ("FONTSIZE", (0,1), (-1,-1), 9.5),
-        ("ALIGN", (1,1), (5,-1), "RIGHT"),
-        ("ALIGN", (6,1), (6,-1), "CENTER"),
-
-        ("ROWBACKGROUNDS", (0,1), (-1,-1), [colors.white, colors.HexColor("#FAFAFA")]),
-        ("GRID", (0,0), (-1,-1), 0.25, colors.HexColor("#E5E7EB")),
-        ("BOX", (0,0), (-1,-1), 0.4, colors.HexColor("#D1D5DB")),
-        ("TOPPADDING", (0,0), (-1,-1), 4),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 4),
-    ]))
+    t.setStyle(_CLIENTS_TABLE_STYLE)
     return t
 
+_ALERTS_TABLE_STYLE = TableStyle([
+    ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+    ("FONTSIZE", (0,0), (-1,0), 10),
+    ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#FEF3C7")),  # warm header
+    ("TEXTCOLOR", (0,0), (-1,0), colors.HexColor("#111827")),
+
+    ("FONTNAME", (0,1), (-1,-1), "Helvetica"),
+    ("FONTSIZE", (0,1), (-1,-1), 9.5),
+    ("ALIGN", (1,1), (3,-1), "RIGHT"),
+    ("ALIGN", (4,1), (4,-1), "CENTER"),
+
+    ("ROWBACKGROUNDS", (0,1), (-1,-1), [colors.white, colors.HexColor("#FFFBEB")]),
+    ("GRID", (0,0), (-1,-1), 0.25, colors.HexColor("#FCD34D")),
+    ("BOX", (0,0), (-1,-1), 0.4, colors.HexColor("#F59E0B")),
+    ("TOPPADDING", (0,0), (-1,-1), 4),
+    ("BOTTOMPADDING", (0,0), (-1,-1), 4),
+])
+
 def _alerts_table(ar):
     alerts = list(ar.alerts or [])
     title = Paragraph("<b>Budget Alerts</b>", _styles["Heading2"])
@@ -1018,23 +1471,7 @@ def _alerts_table(ar):
         rows.append([a.client, _money(a.budget), _money(a.spend), f"{a.pct:.1f}%", a.status.upper()])
 
     t = Table(rows, colWidths=[4.0*cm, 3.0*cm, 3.0*cm, 3.0*cm, 2.0*cm])
-    t.setStyle(TableStyle([
-        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
-        ("FONTSIZE", (0,0), (-1,0), 10),
-        ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#FEF3C7")),  # warm header
-        ("TEXTCOLOR", (0,0), (-1,0), colors.HexColor("#111827")),
-
-        ("FONTNAME", (0,1), (-1,-1), "Helvetica"),
-        ("FONTSIZE", (0,1), (-1,-1), 9.5),
-        ("ALIGN", (1,1), (3,-1), "RIGHT"),
-        ("ALIGN", (4,1), (4,-1), "CENTER"),
-
-        ("ROWBACKGROUNDS", (0,1), (-1,-1), [colors.white, colors.HexColor("#FFFBEB")]),
-        ("GRID", (0,0), (-1,-1), 0.25, colors.HexColor("#FCD34D")),
-        ("BOX", (0,0), (-1,-1), 0.4, colors.HexColor("#F59E0B")),
-        ("TOPPADDING", (0,0), (-1,-1), 4),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 4),
-    ]))
+    t.setStyle(_ALERTS_TABLE_STYLE)
     return [title, Spacer(1, 0.2*cm), t]
 
 def _build_pdf_bytes(brand: str, tagline: str, logo_path: str,
@@ -1103,6 +1540,56 @@ def _build_pdf_bytes_simple(title: str, subtitle: str) -> bytes:
     c.save()
     return buf.getvalue()
 
+# ReportLab layout is CPU-bound and holds the GIL, so concurrent exports render
+# in separate processes. The pool is created on first use, not at import.
+# Workers start from a clean forkserver/spawn process: forking this one would
+# copy its threads, boto3 clients and open DB/HTTP connections.
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_unavailable = False
+_PDF_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+def _warm_singletons() -> None:
+    """Build the per-process clients and the PDF logo before the first request."""
+    if use_s3():
+        warm_s3_client()
+    warm_bedrock_client()
+    _logo_reader(PDF_LOGO_PATH)
+
+def _pdf_worker_init():
+    _logo_reader(PDF_LOGO_PATH)
+
+def _close_pdf_pool():
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+async def _render_pdf(brand: str, tagline: str, logo_path: str,
+                      ar: "AnalyzeResponse", budgets: Dict[str, float]) -> bytes:
+    global _pdf_pool, _pdf_pool_unavailable
+    if PDF_PROCESS_WORKERS > 0 and not _pdf_pool_unavailable:
+        try:
+            if _pdf_pool is None:
+                _pdf_pool = ProcessPoolExecutor(
+                    max_workers=PDF_PROCESS_WORKERS,
+                    mp_context=_PDF_MP_CONTEXT,
+                    initializer=_pdf_worker_init,
+                )
+            return await asyncio.get_running_loop().run_in_executor(
+                _pdf_pool, _build_pdf_bytes, brand, tagline, logo_path, ar, budgets
+            )
+        except BrokenProcessPool as e:
+            logger.warning("PDF process pool broken, rendering in thread: %s", e)
+            _close_pdf_pool()
+        except OSError as e:
+            # can't start worker processes here (no /dev/shm, sandboxed, ...): threads from now on
+            logger.warning("PDF process pool unavailable, rendering in threads: %s", e)
+            _pdf_pool_unavailable = True
+            _close_pdf_pool()
+    return await asyncio.to_thread(_build_pdf_bytes, brand, tagline, logo_path, ar, budgets)
+
 # ===========================================================
 # Routes
 # ===========================================================
@@ -1162,7 +1649,7 @@ async def get_budgets(
     sub = (user.get("sub") if isinstance(user, dict) else None) or PUBLIC_BUDGET_SUB
     if sub == "public-demo":
         sub = PUBLIC_BUDGET_SUB
-    return _load_budgets_for_user(sub, tenant)
+    return dict(_load_budgets_for_user(sub, tenant))
 
 @app.post("/budgets")
 async def save_budgets(
@@ -1195,12 +1682,10 @@ async def admin_list_budgets(
     include: int = Query(default=0, ge=0, le=1),
     _admin: Dict[str, Any] = Depends(get_admin_user),
 ):
-    subs = _list_budgets_users(tenant)
+    subs = await asyncio.to_thread(_list_budgets_users, tenant)
     if include != 1:
         return {"tenant": _tenant_or_default(tenant) if BUDGETS_TENANTED else None, "users": subs}
-    items = {}
-    for s in subs:
-        items[s] = _load_budgets_for_user(s, tenant)
+    items = {s: dict(b) for s, b in (await _load_budgets_many(subs, tenant)).items()}
     return {"tenant": _tenant_or_default(tenant) if BUDGETS_TENANTED else None, "items": items}
 
 @app.get("/budgets/admin/{sub}")
@@ -1209,7 +1694,7 @@ async def admin_get_budgets_for_sub(
     tenant: Optional[str] = Query(default=None),
     _admin: Dict[str, Any] = Depends(get_admin_user),
 ):
-    return _load_budgets_for_user(sub, tenant)
+    return dict(_load_budgets_for_user(sub, tenant))
 
 @app.post("/budgets/admin/{sub}")
 async def admin_set_budgets_for_sub(
@@ -1246,21 +1731,21 @@ def sample_csv(sample_name: str):
         raise HTTPException(status_code=404, detail="Sample file missing on server")
     return FileResponse(path, media_type="text/csv", filename=filename)
 
-def _read_sample_csv_text(sample: str) -> str:
+def _analyze_sample(sample: str) -> Tuple[List[Dict[str, Any]], AnalyzeResponse]:
+    # samples ship with the service: parsed once, then served from the analyze cache
     fname = SAMPLE_MAP.get(sample.lower())
     if not fname:
         raise HTTPException(status_code=400, detail="Unknown sample")
     path = os.path.join(os.path.dirname(__file__), "data", fname)
-    if not os.path.exists(path):
+    try:
+        return _analyze_local_file(path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Sample file missing on server")
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
 
 @app.get("/demo/analyze", response_model=AnalyzeResponse)
 def demo_analyze(sample: str, tenant: Optional[str] = Query(default=None),
                  user: Dict[str, Any] = Depends(get_user_optional)):
-    csv_text = _read_sample_csv_text(sample)
-    _, ar = _analyze_text(csv_text)
+    _, ar = _analyze_sample(sample)
     sub = (user.get("sub") if isinstance(user, dict) else None) or PUBLIC_BUDGET_SUB
     if sub == "public-demo":
         sub = PUBLIC_BUDGET_SUB
@@ -1275,8 +1760,7 @@ async def demo_recommend(
     _rl: Any = Depends(rate_limit),
     user: Dict[str, Any] = Depends(get_current_user),
 ):
-    csv_text = _read_sample_csv_text(sample)
-    rows, ar = _analyze_text(csv_text)
+    rows, ar = await asyncio.to_thread(_analyze_sample, sample)
     parsed, pretty, source = await _recommend_from_rows(rows, ar)
     parsed_model = RecommendJSON(**parsed)
     return RecommendResponse(ai_recommendation=pretty, source=source, parsed_json=parsed_model)
@@ -1292,8 +1776,7 @@ def analyze(
     user: Dict[str, Any] = Depends(get_user_optional),
 ):
     if key:
-        csv_text = _read_history_csv_text(key)
-        _, ar = _analyze_text(csv_text)
+        _, ar = _analyze_history_key(key)
         sub = (user.get("sub") if isinstance(user, dict) else None) or PUBLIC_BUDGET_SUB
         if sub == "public-demo":
             sub = PUBLIC_BUDGET_SUB
@@ -1307,8 +1790,7 @@ def analyze(
     if eff_source and eff_source not in ("s3", "local"):
         eff_source = None
 
-    csv_text = _read_billing_csv_text(force_source=eff_source)
-    _, ar = _analyze_text(csv_text)
+    _, ar = _analyze_billing_csv(force_source=eff_source)
 
     sub = (user.get("sub") if isinstance(user, dict) else None) or PUBLIC_BUDGET_SUB
     if sub == "public-demo":
@@ -1332,24 +1814,23 @@ async def upload_csv(
     file: UploadFile = File(...),
     user: Dict[str, Any] = Depends(get_current_user),
 ):
-    raw_bytes = await file.read()
-    if not raw_bytes or len(raw_bytes) < 3:
+    # Starlette has already spooled the body (memory, then disk past 1 MiB);
+    # work from that file object rather than pulling it all into bytes.
+    fobj = file.file
+    size = fobj.seek(0, os.SEEK_END)
+    if size < 3:
         raise HTTPException(status_code=400, detail="Empty or invalid file")
 
-    text, enc_used = _decode_csv_bytes(raw_bytes)
-    logger.info("Upload decode successful using encoding=%s; bytes=%d", enc_used, len(raw_bytes))
-
-    _, ar = _analyze_text(text)
+    _, ar, enc_used = await asyncio.to_thread(_analyze_upload_file, fobj)
+    logger.info("Upload decode successful using encoding=%s; bytes=%d", enc_used, size)
 
     stored_key: Optional[str] = None
     if use_s3():
         bucket = os.environ.get("S3_BUCKET")
         prefix = os.environ.get("S3_UPLOAD_PREFIX", "uploads/")
-        sub = user.get("sub", "anon")
-        ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-        safe_name = os.path.basename(file.filename or "upload.csv")
-        key = f"{prefix}{sub}/{ts}_{safe_name}"
-        ok = put_s3_object(bucket, key, raw_bytes, content_type="text/csv")
+        key = _upload_key(prefix, user.get("sub", "anon"), file.filename)
+        fobj.seek(0)
+        ok = await asyncio.to_thread(upload_s3_fileobj, bucket, key, fobj, content_type="text/csv")
         if ok:
             stored_key = key
             logger.info("Stored uploaded CSV → s3://%s/%s", bucket, key)
@@ -1363,6 +1844,60 @@ async def upload_csv(
         meta={"source": "upload", "key": stored_key} if stored_key else {"source": "upload"},
     )
 
+# ---- Direct-to-S3 upload (protected): the client PUTs the CSV to S3 itself,
+# then posts only the key, so the file body never passes through the API ----
+UPLOAD_URL_TTL_SEC = int(os.getenv("UPLOAD_URL_TTL_SEC", "900"))
+
+@app.post("/uploads/init")
+async def uploads_init(
+    req: UploadInitRequest,
+    user: Dict[str, Any] = Depends(get_current_user),
+):
+    if not use_s3():
+        raise HTTPException(status_code=400, detail="S3 not configured")
+    sub = user.get("sub")
+    if not sub:
+        raise HTTPException(status_code=400, detail="Missing user.sub in token")
+    bucket = os.environ.get("S3_BUCKET")
+    prefix = os.environ.get("S3_UPLOAD_PREFIX", "uploads/")
+    key = _upload_key(prefix, sub, req.filename)
+    url = generate_presigned_put_url(bucket, key, content_type=req.content_type, expires_in=UPLOAD_URL_TTL_SEC)
+    if not url:
+        raise HTTPException(status_code=500, detail="Failed to generate upload URL")
+    return {
+        "url": url,
+        "key": key,
+        "method": "PUT",
+        "headers": {"Content-Type": req.content_type},
+        "expires_in": UPLOAD_URL_TTL_SEC,
+    }
+
+@app.post("/upload_analyze", response_model=UploadAnalyzeResponse)
+def upload_analyze(
+    req: UploadAnalyzeRequest,
+    user: Dict[str, Any] = Depends(get_current_user),
+):
+    if not use_s3():
+        raise HTTPException(status_code=400, detail="S3 not configured")
+    bucket = os.environ.get("S3_BUCKET")
+    prefix = os.environ.get("S3_UPLOAD_PREFIX", "uploads/")
+    if not _key_allowed_for_user(req.key, user.get("sub"), prefix):
+        raise HTTPException(status_code=403, detail="Key not allowed")
+
+    out = _analyze_s3_object(bucket, req.key)
+    if out is None:
+        raise HTTPException(status_code=404, detail="Could not read specified key")
+    _, ar = out
+
+    return UploadAnalyzeResponse(
+        total_revenue=ar.total_revenue,
+        total_cost=ar.total_cost,
+        total_profit=ar.total_profit,
+        client_insights=ar.client_insights,
+        stored_key=req.key,
+        meta={"source": "upload", "key": req.key},
+    )
+
 # ===========================================================
 # History + analyze/recommend by historical key
 # ===========================================================
@@ -1377,9 +1912,11 @@ async def history(user: Dict[str, Any] = Depends(get_current_user)):
         raise HTTPException(status_code=400, detail="Missing user.sub in token")
 
     user_prefix = f"{prefix}{sub}/"
-    items = list_s3_objects(bucket, user_prefix, max_keys=500)
-    items.sort(key=lambda x: x.get("last_modified") or "", reverse=True)
-    return {"items": items, "bucket": bucket, "prefix": user_prefix}
+    items = await asyncio.to_thread(list_s3_objects, bucket, user_prefix, max_keys=500)
+    items.sort(key=lambda x: x["last_modified"], reverse=True)
+    # datetimes are encoded straight to bytes (no jsonable_encoder pass)
+    body = _json_bytes({"items": items, "bucket": bucket, "prefix": user_prefix})
+    return Response(body, media_type="application/json")
 
 @app.get("/history/latest")
 async def history_latest(user: Dict[str, Any] = Depends(get_current_user)):
@@ -1392,9 +1929,9 @@ async def history_latest(user: Dict[str, Any] = Depends(get_current_user)):
         raise HTTPException(status_code=400, detail="Missing user.sub in token")
 
     user_prefix = f"{prefix}{sub}/"
-    items = list_s3_objects(bucket, user_prefix, max_keys=100)
-    items.sort(key=lambda x: x.get("last_modified") or "", reverse=True)
-    return {"item": items[0] if items else None}
+    items = await asyncio.to_thread(list_s3_objects, bucket, user_prefix, max_keys=100)
+    latest = max(items, key=lambda x: x["last_modified"], default=None)
+    return Response(_json_bytes({"item": latest}), media_type="application/json")
 
 @app.get("/history/presign")
 async def history_presign(
@@ -1425,9 +1962,10 @@ async def history_delete(
     sub = user.get("sub")
     if not _key_allowed_for_user(key, sub, prefix):
         raise HTTPException(status_code=403, detail="Key not allowed")
-    ok = delete_s3_object(bucket, key)
+    ok = await asyncio.to_thread(delete_s3_object, bucket, key)
     if not ok:
         raise HTTPException(status_code=500, detail="Delete failed")
+    _analyze_cache.pop((bucket, key))
     return {"deleted": True, "key": key}
 
 @app.get("/analyze/by-key", response_model=AnalyzeResponse)
@@ -1444,12 +1982,12 @@ async def analyze_by_key(
     if not _key_allowed_for_user(key, sub, prefix):
         raise HTTPException(status_code=403, detail="Key not allowed")
 
-    csv_text = read_s3_file(bucket, key)
-    if csv_text is None:
+    out = await asyncio.to_thread(_analyze_s3_object, bucket, key)
+    if out is None:
         raise HTTPException(status_code=404, detail="Could not read specified key")
-    _, ar = _analyze_text(csv_text)
+    _, ar = out
 
-    budgets = _load_budgets_for_user(sub, tenant)
+    budgets = await asyncio.to_thread(_load_budgets_for_user, sub, tenant)
     ar = _attach_alerts(ar, budgets)
 
     ar = _attach_meta(ar, {"source": "history", "key": key, "budgets_sub": sub})
@@ -1469,11 +2007,11 @@ async def recommend_by_key(
     if not _key_allowed_for_user(key, sub, prefix):
         raise HTTPException(status_code=403, detail="Key not allowed")
 
-    csv_text = read_s3_file(bucket, key)
-    if csv_text is None:
+    out = await asyncio.to_thread(_analyze_s3_object, bucket, key)
+    if out is None:
         raise HTTPException(status_code=404, detail="Could not read specified key")
 
-    rows, ar = _analyze_text(csv_text)
+    rows, ar = out
     parsed, pretty, source = await _recommend_from_rows(rows, ar)
     parsed_model = RecommendJSON(**parsed)
     return RecommendResponse(ai_recommendation=pretty, source=source, parsed_json=parsed_model)
@@ -1486,8 +2024,7 @@ async def recommend(
     _rl: Any = Depends(rate_limit),
     user: Dict[str, Any] = Depends(get_current_user),
 ):
-    csv_text = _read_billing_csv_text()
-    rows, ar = _analyze_text(csv_text)
+    rows, ar = await asyncio.to_thread(_analyze_billing_csv)
     parsed, pretty, source = await _recommend_from_rows(rows, ar)
     parsed_model = RecommendJSON(**parsed)
     return RecommendResponse(ai_recommendation=pretty, source=source, parsed_json=parsed_model)
@@ -1495,6 +2032,9 @@ async def recommend(
 # ===========================================================
 # NEW: Industry Benchmarks API (dynamic; fixes 404)
 # ===========================================================
+# Mock industry baselines (can be replaced with real dataset/API)
+_INDUSTRY_AVG_WASTE = {"msp": 22.0, "saas": 18.0, "it": 25.0, "general": 20.0}
+
 @app.get("/benchmarks", response_model=BenchmarkResponse)
 def get_benchmarks(
     industry: str = Query(default="msp"),
@@ -1509,31 +2049,17 @@ def get_benchmarks(
     """
     # Resolve dataset
     if key:
-        csv_text = _read_history_csv_text(key)
+        _, ar = _analyze_history_key(key)
     else:
         eff_source = (source or DEFAULT_ANALYZE_SOURCE or None)
         if eff_source and eff_source not in ("s3", "local"):
             eff_source = None
-        csv_text = _read_billing_csv_text(force_source=eff_source)
+        _, ar = _analyze_billing_csv(force_source=eff_source)
 
-    _, ar = _analyze_text(csv_text)
+    your_waste_pct, potential_savings = _benchmark_stats(ar)
 
-    # Your waste (cost-weighted)
-    your_waste_pct = _weighted_avg_waste(ar.client_insights)
-
-    # Mock industry baselines (can be replaced with real dataset/API)
     industry = (industry or "msp").strip().lower()
-    base_map = {
-        "msp": 22.0,
-        "saas": 18.0,
-        "it": 25.0,
-        "general": 20.0,
-    }
-    industry_avg = float(base_map.get(industry, base_map["msp"]))
-
-    # Rightsizing simulator for potential savings
-    sims = _rightsizing_simulator(ar)
-    potential_savings = sum(v.get("savings_usd", 0.0) for v in sims.values())
+    industry_avg = _INDUSTRY_AVG_WASTE.get(industry, _INDUSTRY_AVG_WASTE["msp"])
 
     return BenchmarkResponse(
         source="api",
@@ -1549,9 +2075,14 @@ def get_benchmarks(
 # ===========================================================
 # Execute Action + Actions Log
 # ===========================================================
+# SUPEROPS_ASYNC=true: reply without waiting on SuperOps; the result is then
+# {"mode": "queued"} instead of the provider's response.
+SUPEROPS_ASYNC = os.getenv("SUPEROPS_ASYNC", "false").lower() == "true"
+
 @app.post("/execute_action", response_model=ExecuteActionResponse)
 async def execute_action(
     payload: ExecuteActionRequest,
+    background_tasks: BackgroundTasks,
     user: Dict[str, Any] = Depends(get_user_optional),  # allow public if enabled
 ):
     action = payload.action.dict()
@@ -1559,10 +2090,16 @@ async def execute_action(
     email = (user.get("email") if isinstance(user, dict) else None) or \
             (user.get("username") if isinstance(user, dict) else None) or "unknown"
 
-    so_result = run_superops_action({
+    so_request = {
         "user": {"sub": sub, "email": email},
         "action": action,
-    })
+    }
+    if SUPEROPS_ASYNC:
+        # sent after the response
+        background_tasks.add_task(run_superops_action, so_request)
+        so_result = {"mode": "queued", "via": "background"}
+    else:
+        so_result = await asyncio.to_thread(run_superops_action, so_request)
 
     event = {
         "id": str(uuid.uuid4()),
@@ -1574,7 +2111,7 @@ async def execute_action(
         "source": "finops-agent",
         "auth": ("public" if (not COGNITO_ENABLED or ALLOW_PUBLIC_ACTIONS) and (sub in ("public-demo", "anon")) else "cognito"),
     }
-    ok, stored_where, action_id = _persist_action_event(event)
+    ok, stored_where, action_id = await asyncio.to_thread(_persist_action_event, event)
 
     return ExecuteActionResponse(
         executed=True,
@@ -1589,18 +2126,6 @@ async def execute_action(
         superops_result=so_result,
     )
 
-@app.get("/actions")
-def list_actions():
-    out = []
-    if os.path.exists(ACTIONS_LOG_PATH):
-        with open(ACTIONS_LOG_PATH, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    out.append(json.loads(line))
-                except:
-                    pass
-    return {"items": out[-50:][::-1], "store": ACTIONS_LOG_PATH, "ddb_table": DDB_TABLE or None}
-
 @app.get("/mockclients")
 def mockclients():
     if os.getenv("MOCK_CLIENTS_ENABLED", "true").lower() == "true":
@@ -1608,7 +2133,7 @@ def mockclients():
     return []
 
 # ===========================================================
-# PDF Export endpoint (via temp file -> FileResponse)
+# PDF Export endpoint (bytes straight into the response body)
 # ===========================================================
 @app.get("/export/pdf")
 async def export_pdf(
@@ -1621,24 +2146,22 @@ async def export_pdf(
 ):
     # 1) Build ar + budgets (unchanged logic)
     if key:
-        csv_text = _read_history_csv_text(key)
-        _, ar = _analyze_text(csv_text)
+        _, ar = await asyncio.to_thread(_analyze_history_key, key)
         sub_for_budgets = (user.get("sub") if isinstance(user, dict) else None) or PUBLIC_BUDGET_SUB
         if sub_for_budgets == "public-demo":
             sub_for_budgets = PUBLIC_BUDGET_SUB
-        budgets = _load_budgets_for_user(sub_for_budgets, tenant)
+        budgets = _normalize_budgets(await asyncio.to_thread(_load_budgets_for_user, sub_for_budgets, tenant))
         ar = _attach_alerts(ar, budgets)
         ar = _attach_meta(ar, {"source": "history", "key": key, "budgets_sub": sub_for_budgets})
     else:
         eff_source = (source or DEFAULT_ANALYZE_SOURCE or None)
         if eff_source and eff_source not in ("s3", "local"):
             eff_source = None
-        csv_text = _read_billing_csv_text(force_source=eff_source)
-        _, ar = _analyze_text(csv_text)
+        _, ar = await asyncio.to_thread(_analyze_billing_csv, eff_source)
         sub_for_budgets = (user.get("sub") if isinstance(user, dict) else None) or PUBLIC_BUDGET_SUB
         if sub_for_budgets == "public-demo":
             sub_for_budgets = PUBLIC_BUDGET_SUB
-        budgets = _load_budgets_for_user(sub_for_budgets, tenant)
+        budgets = _normalize_budgets(await asyncio.to_thread(_load_budgets_for_user, sub_for_budgets, tenant))
         ar = _attach_alerts(ar, budgets)
         ar = _attach_meta(ar, {
             "source": ("local" if eff_source == "local" or not use_s3() else "s3"),
@@ -1649,30 +2172,21 @@ async def export_pdf(
 
     # 2) Build bytes
     if simple == 1:
-        pdf_bytes = _build_pdf_bytes_simple("FinOps+ Report", "Simple canvas smoke test")
+        pdf_bytes = await asyncio.to_thread(_build_pdf_bytes_simple, "FinOps+ Report", "Simple canvas smoke test")
     else:
-        pdf_bytes = _build_pdf_bytes(PDF_BRAND, PDF_TAGLINE, PDF_LOGO_PATH, ar, budgets)
+        pdf_bytes = await _render_pdf(PDF_BRAND, PDF_TAGLINE, PDF_LOGO_PATH, ar, budgets)
 
     if not isinstance(pdf_bytes, (bytes, bytearray)) or len(pdf_bytes) < 8 or not bytes(pdf_bytes).startswith(b"%PDF-"):
         return JSONResponse({"detail": "PDF build failed"}, status_code=500)
 
-    # 3) Write to a temp file and stream via FileResponse (sets Content-Length)
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    try:
-        tmp.write(pdf_bytes)
-        tmp.flush()
-        tmp.close()
-        filename = f'finops_report_{datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")}.pdf'
-        return FileResponse(
-            path=tmp.name,
-            media_type="application/pdf",
-            filename=filename,
-            headers={"Cache-Control": "no-store"}
-        )
-    except Exception:
-        try:
-            tmp.close()
-        except:
-            pass
-        raise
+    # 3) Return the bytes as the body (Response sets Content-Length)
+    filename = f'finops_report_{datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")}.pdf'
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        },
+    )
 
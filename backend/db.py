@@ -1,16 +1,85 @@
 # db.py
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
 
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///./finops.db")
-engine = create_engine(DB_URL, connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {})
+
+# Sized for bursts of writers on /api/actions/execute and /api/history/add:
+# fail fast on pool exhaustion instead of parking requests for 30s.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+
+def _pool_kwargs(url: str) -> dict:
+    """Request-path QueuePool sizing for server databases; SQLite keeps its dialect's default pool."""
+    if url.startswith("sqlite"):
+        return {}
+    return dict(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+# SQLAlchemy 2.x caches compiled SQL per statement shape (values become bind
+# params), so the handful of router statements compile once per process.
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
+
+def _async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql://", "postgres://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+ASYNC_DB_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DB_URL)
+
+# sync engine: DDL / bootstrap (Base.metadata.create_all). It runs once at
+# startup, so no pool: connections close after use instead of idling per worker.
+engine = create_engine(
+    DB_URL,
+    connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {},
+    poolclass=NullPool,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# async engine: request path (routers)
+async_engine = create_async_engine(
+    ASYNC_DB_URL, query_cache_size=DB_QUERY_CACHE_SIZE, **_pool_kwargs(ASYNC_DB_URL)
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    """WAL so readers don't stall behind a writer; NORMAL fsync is safe under WAL."""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.close()
+
+
+if DB_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _sqlite_pragmas)
+if ASYNC_DB_URL.startswith("sqlite"):
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
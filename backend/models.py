@@ -6,7 +6,7 @@ from db import Base
 class ActionLog(Base):
     __tablename__ = "action_logs"
     id = Column(Integer, primary_key=True, index=True)
-    time = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    time = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     user = Column(String(255), nullable=False)
     title = Column(String(255), nullable=False)
     targets = Column(String(255), nullable=False)
@@ -16,7 +16,7 @@ class ActionLog(Base):
 class HistoryEvent(Base):
     __tablename__ = "history_events"
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     user = Column(String(255), nullable=False)
     kind = Column(String(64), nullable=False)     # e.g., 'insights_generated', 'snapshot_loaded'
     message = Column(Text, nullable=False)        # free text shown in UI
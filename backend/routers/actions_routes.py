@@ -1,11 +1,19 @@
 # routers/actions_routes.py
-from typing import List, Optional, Union
-from fastapi import APIRouter, Depends, Header, Body
-from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+import json
+from typing import Any, Dict, List, Optional, TypedDict
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_db
 from models import ActionLog, HistoryEvent
+from utils import list_cache
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 # ---------------- Canonical router (/api/actions/...) ----------------
 router = APIRouter(prefix="/api/actions", tags=["actions"])
@@ -15,85 +23,173 @@ router = APIRouter(prefix="/api/actions", tags=["actions"])
 router_compat = APIRouter(tags=["actions-compat"])
 
 
-# ---------------- Models ----------------
-class ActionPayload(BaseModel):
-    title: str = Field(..., description="Action title")
-    targets: Optional[List[str]] = None
-    # be lenient with naming from UI
-    estImpact: Optional[float] = None
-    est_impact_usd: Optional[float] = None
-    source: str = "finops-agent"
-    user: Optional[str] = None  # optional explicit user override
+# ---------------- Payload ----------------
+# Plain dicts + explicit checks instead of Pydantic models on the write path.
+class ActionPayload(TypedDict):
+    title: str
+    targets: List[str]
+    est_impact: Optional[float]   # from est_impact_usd or estImpact (UI naming)
+    source: str
+    user: Optional[str]           # optional explicit user override
+    # extra LLM fields (confidence, risk, current_cost, ...) are tolerated, not stored
+
 
-    # extra fields tolerated from LLM JSON, not stored
-    confidence: Optional[float] = None
-    risk: Optional[str] = None
-    current_cost: Optional[float] = None
-    projected_cost: Optional[float] = None
+def _bad(msg: str) -> HTTPException:
+    return HTTPException(status_code=422, detail=msg)
 
 
-class ExecuteEnvelope(BaseModel):
-    action: ActionPayload
+def _opt_float(d: Dict[str, Any], key: str) -> Optional[float]:
+    v = d.get(key)
+    if v is None:
+        return None
+    if isinstance(v, bool) or not isinstance(v, (int, float, str)):
+        raise _bad(f"{key} must be a number")
+    try:
+        return float(v)
+    except ValueError:
+        raise _bad(f"{key} must be a number")
 
 
-def _unwrap_envelope(payload: Union[ExecuteEnvelope, ActionPayload]) -> ActionPayload:
-    return payload.action if isinstance(payload, ExecuteEnvelope) else payload
+def _as_str(v: Any, key: str) -> str:
+    # same coercion as the former pydantic v1 str fields: numbers -> str(v)
+    if isinstance(v, str):
+        return v
+    if isinstance(v, (int, float)):
+        return str(v)
+    raise _bad(f"{key} must be a string")
 
 
-def _persist_action_and_history(
-    action: ActionPayload, db: Session, x_user_email: Optional[str]
-):
-    user = action.user or x_user_email or "anonymous@demo.local"
-    est = action.est_impact_usd if action.est_impact_usd is not None else action.estImpact
+def _opt_str(d: Dict[str, Any], key: str) -> Optional[str]:
+    v = d.get(key)
+    return None if v is None else _as_str(v, key)
 
-    arow = ActionLog(
-        user=user,
-        title=action.title,
-        targets=", ".join(action.targets or []),
+
+async def _json_body(request: Request) -> Dict[str, Any]:
+    try:
+        data = _loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=422, detail="Body must be a JSON object")
+    return data
+
+
+def _unwrap_envelope(data: Dict[str, Any]) -> ActionPayload:
+    """
+    Accept either { "action": {...} } or a bare action dict.
+    """
+    if isinstance(data.get("action"), dict):
+        data = data["action"]
+
+    title = data.get("title")
+    if title is None:
+        raise _bad("title is required and must be a string")
+    title = _as_str(title, "title")
+
+    targets = data.get("targets")
+    if targets is None:
+        targets = []
+    elif not isinstance(targets, list):
+        raise _bad("targets must be a list of strings")
+    else:
+        targets = [_as_str(t, "targets items") for t in targets]
+
+    est = _opt_float(data, "est_impact_usd")
+    if est is None:
+        est = _opt_float(data, "estImpact")
+
+    return ActionPayload(
+        title=title,
+        targets=targets,
         est_impact=est,
-        source=action.source or "finops-agent",
+        source=_opt_str(data, "source") or "finops-agent",
+        user=_opt_str(data, "user"),
     )
-    db.add(arow)
-    db.commit()
-    db.refresh(arow)
 
-    # Best-effort history entry
+
+async def _persist_action_and_history(
+    action: ActionPayload, db: AsyncSession, x_user_email: Optional[str]
+):
+    user = action["user"] or x_user_email or "anonymous@demo.local"
+
+    # Core INSERT ... RETURNING: no ORM identity map / refresh round-trip
+    action_id = (
+        await db.execute(
+            insert(ActionLog)
+            .values(
+                user=user,
+                title=action["title"],
+                targets=", ".join(action["targets"]),
+                est_impact=action["est_impact"],
+                source=action["source"],
+            )
+            .returning(ActionLog.id)
+        )
+    ).scalar_one()
+
+    # Best-effort history entry (savepoint, so a failure here keeps the action row)
     try:
-        msg = f"Executed: {action.title}"
-        if action.targets:
-            msg += f" → {', '.join(action.targets)}"
-        h = HistoryEvent(user=user, kind="action_executed", message=msg, key=None)
-        db.add(h)
-        db.commit()
+        msg = f"Executed: {action['title']}"
+        if action["targets"]:
+            msg += f" → {', '.join(action['targets'])}"
+        async with db.begin_nested():
+            await db.execute(
+                insert(HistoryEvent).values(user=user, kind="action_executed", message=msg, key=None)
+            )
     except Exception:
-        db.rollback()  # don't break the main request
+        pass  # don't break the main request
+
+    await db.commit()
+    await list_cache.invalidate("actions")
+    await list_cache.invalidate("history")
 
     return {
         "ok": True,
         "executed": True,
         "stored": True,
         "preview": False,
-        "actionId": arow.id,
+        "actionId": action_id,
         "superops_result": None,
     }
 
 
+# column tuples only: no ORM entity hydration for a read-only listing.
+# Built once; the per-request limit is a bind param, so the compiled form is cached.
+_LIST_ACTIONS = select(
+    ActionLog.id,
+    ActionLog.time,
+    ActionLog.user,
+    ActionLog.source,
+    ActionLog.title,
+    ActionLog.targets,
+    ActionLog.est_impact,
+).order_by(ActionLog.time.desc())
+
+
 # ---------------- Endpoints: canonical ----------------
 @router.post("/execute")
-def execute_action(
-    payload: Union[ExecuteEnvelope, ActionPayload] = Body(...),
-    db: Session = Depends(get_db),
+async def execute_action(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     x_user_email: Optional[str] = Header(default=None),
 ):
-    action = _unwrap_envelope(payload)
-    return _persist_action_and_history(action, db, x_user_email)
+    action = _unwrap_envelope(await _json_body(request))
+    return await _persist_action_and_history(action, db, x_user_email)
 
 
 @router.get("")
-def list_actions(db: Session = Depends(get_db), limit: int = 50):
-    q = db.query(ActionLog).order_by(ActionLog.time.desc()).limit(limit).all()
+async def list_actions(
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=list_cache.LIST_LIMIT_MAX),
+):
+    cache_key = list_cache.list_key("actions", limit)
+    cached = await list_cache.get_cached(cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
+
+    res = await db.execute(_LIST_ACTIONS.limit(limit))
     items = []
-    for r in q:
+    for r in res.all():
         items.append(
             {
                 "id": r.id,
@@ -107,20 +203,26 @@ def list_actions(db: Session = Depends(get_db), limit: int = 50):
                 },
             }
         )
-    return {"items": items}
+    out = {"items": items}
+    # already JSON-ready: encoded once (and cached as bytes), no jsonable_encoder pass
+    body = await list_cache.set_cached(cache_key, out)
+    return Response(body, media_type="application/json")
 
 
 # ---------------- Endpoints: legacy (no /api prefix) ----------------
 @router_compat.post("/actions/execute")
-def execute_action_compat(
-    payload: Union[ExecuteEnvelope, ActionPayload] = Body(...),
-    db: Session = Depends(get_db),
+async def execute_action_compat(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     x_user_email: Optional[str] = Header(default=None),
 ):
-    action = _unwrap_envelope(payload)
-    return _persist_action_and_history(action, db, x_user_email)
+    action = _unwrap_envelope(await _json_body(request))
+    return await _persist_action_and_history(action, db, x_user_email)
 
 
 @router_compat.get("/actions")
-def list_actions_compat(db: Session = Depends(get_db), limit: int = 50):
-    return list_actions(db=db, limit=limit)
+async def list_actions_compat(
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=list_cache.LIST_LIMIT_MAX),
+):
+    return await list_actions(db=db, limit=limit)
@@ -1,11 +1,19 @@
 # routers/history_routes.py
-from typing import Optional, Union, Any, Dict
-from fastapi import APIRouter, Depends, Header, Body, Query
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+import json
+from typing import Optional, Any, Dict, TypedDict
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_db
 from models import HistoryEvent
+from utils import list_cache
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 # Canonical: /api/history/...
 router = APIRouter(prefix="/api/history", tags=["history"])
@@ -13,80 +21,89 @@ router = APIRouter(prefix="/api/history", tags=["history"])
 router_compat = APIRouter(tags=["history-compat"])
 
 
-# ---- Models ----
-class HistoryIn(BaseModel):
-    kind: Optional[str] = None          # 'insights_generated' | 'snapshot_loaded' | 'action_executed' | ...
-    message: Optional[str] = None       # free text
-    key: Optional[str] = None           # upload/history key
-    user: Optional[str] = None          # optional override
-
-    # Tolerate alternative field names coming from UI
-    type: Optional[str] = None          # alias for kind
-    title: Optional[str] = None         # fallback for message
-    ts: Optional[int] = None            # ignored for now (db sets created_at)
+# ---- Payload ----
+# Plain dicts + explicit checks instead of Pydantic models on the write path.
+class HistoryIn(TypedDict):
+    kind: str                 # 'insights_generated' | 'snapshot_loaded' | 'action_executed' | ...
+    message: str              # free text
+    key: Optional[str]        # upload/history key
+    user: Optional[str]       # optional override
 
 
-class HistoryEnvelope(BaseModel):
-    event: HistoryIn
+# ---- Helpers ----
+async def _json_body(request: Request) -> Dict[str, Any]:
+    try:
+        data = _loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=422, detail="Body must be a JSON object")
+    return data
 
 
-# ---- Helpers ----
-def _coerce_event(payload: Union[HistoryIn, HistoryEnvelope, Dict[str, Any]]) -> HistoryIn:
+def _pick_str(d: Dict[str, Any], *keys: str) -> Optional[str]:
+    """
+    First truthy value among keys (tolerant UI naming). Numbers are coerced
+    with str() as the former pydantic v1 model did; dicts/lists are rejected.
+    """
+    for k in keys:
+        v = d.get(k)
+        if v:
+            if isinstance(v, str):
+                return v
+            if isinstance(v, (int, float)):
+                return str(v)
+            raise HTTPException(status_code=422, detail=f"{k} must be a string")
+    return None
+
+
+def _coerce_event(payload: Dict[str, Any]) -> HistoryIn:
     """
     Accept:
-      - bare HistoryIn
-      - { "event": HistoryIn }
-      - dict (from axios) possibly with alternate keys (type/title)
+      - bare event dict
+      - { "event": {...} }
+      possibly with alternate keys (type/title/user_email); ts is ignored (db sets created_at)
     """
-    if isinstance(payload, HistoryEnvelope):
-        return payload.event
-
-    if isinstance(payload, HistoryIn):
-        return payload
+    d = payload["event"] if isinstance(payload.get("event"), dict) else payload
+    return HistoryIn(
+        kind=(_pick_str(d, "kind", "type") or "event").strip(),
+        message=(_pick_str(d, "message", "title") or "").strip() or "(no message)",
+        key=_pick_str(d, "key"),
+        user=_pick_str(d, "user", "user_email"),
+    )
 
-    # dict case
-    if isinstance(payload, dict):
-        if "event" in payload and isinstance(payload["event"], dict):
-            d = payload["event"]
-        else:
-            d = payload
 
-        # map tolerant keys -> HistoryIn
-        return HistoryIn(
-            kind=d.get("kind") or d.get("type") or "event",
-            message=d.get("message") or d.get("title"),
-            key=d.get("key"),
-            user=d.get("user") or d.get("user_email"),
-            ts=d.get("ts"),
-        )
+async def _add_history_core(evt: HistoryIn, db: AsyncSession, x_user_email: Optional[str]):
+    user = evt["user"] or x_user_email or "anonymous@demo.local"
 
-    # Fallback to empty HistoryIn (should not happen)
-    return HistoryIn(kind="event", message=None, key=None, user=None)
+    row = HistoryEvent(user=user, kind=evt["kind"], message=evt["message"], key=evt["key"])
+    db.add(row)
+    await db.commit()
+    await list_cache.invalidate("history")
+    return {"ok": True, "id": row.id}
 
 
-def _add_history_core(evt: HistoryIn, db: Session, x_user_email: Optional[str]):
-    user = evt.user or x_user_email or "anonymous@demo.local"
+# column tuples only: no ORM entity hydration for a read-only listing.
+# Built once; the per-request limit is a bind param, so the compiled form is cached.
+_RECENT_EVENTS = select(
+    HistoryEvent.id,
+    HistoryEvent.created_at,
+    HistoryEvent.kind,
+    HistoryEvent.message,
+    HistoryEvent.key,
+    HistoryEvent.user,
+).order_by(HistoryEvent.created_at.desc())
 
-    # Final field coercion / defaults
-    kind = (evt.kind or evt.type or "event").strip()
-    message = (evt.message or evt.title or "").strip() or "(no message)"
-    key = evt.key
-
-    row = HistoryEvent(user=user, kind=kind, message=message, key=key)
-    db.add(row)
-    db.commit()
-    db.refresh(row)
-    return {"ok": True, "id": row.id}
 
+async def _recent(db: AsyncSession, limit: int):
+    cache_key = list_cache.list_key("history", limit)
+    cached = await list_cache.get_cached(cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
 
-def _recent(db: Session, limit: int):
-    rows = (
-        db.query(HistoryEvent)
-        .order_by(HistoryEvent.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-    return {
+    res = await db.execute(_RECENT_EVENTS.limit(limit))
+    rows = res.all()
+    out = {
         "items": [
             {
                 "id": r.id,
@@ -100,35 +117,38 @@ def _recent(db: Session, limit: int):
             for r in rows
         ]
     }
+    # already JSON-ready: encoded once (and cached as bytes), no jsonable_encoder pass
+    body = await list_cache.set_cached(cache_key, out)
+    return Response(body, media_type="application/json")
 
 
 # ---- Canonical routes (/api/history/...) ----
 @router.post("/add")
-def add_history(
-    payload: Union[HistoryIn, HistoryEnvelope, Dict[str, Any]] = Body(...),
-    db: Session = Depends(get_db),
+async def add_history(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     x_user_email: Optional[str] = Header(default=None),
 ):
-    evt = _coerce_event(payload)
-    return _add_history_core(evt, db, x_user_email)
+    evt = _coerce_event(await _json_body(request))
+    return await _add_history_core(evt, db, x_user_email)
 
 
 @router.get("/recent")
-def recent(db: Session = Depends(get_db), limit: int = Query(10, ge=1, le=200)):
-    return _recent(db, limit)
+async def recent(db: AsyncSession = Depends(get_db), limit: int = Query(10, ge=1, le=list_cache.LIST_LIMIT_MAX)):
+    return await _recent(db, limit)
 
 
 # ---- Legacy compat (/history/...) ----
 @router_compat.post("/history/add")
-def add_history_compat(
-    payload: Union[HistoryIn, HistoryEnvelope, Dict[str, Any]] = Body(...),
-    db: Session = Depends(get_db),
+async def add_history_compat(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     x_user_email: Optional[str] = Header(default=None),
 ):
-    evt = _coerce_event(payload)
-    return _add_history_core(evt, db, x_user_email)
+    evt = _coerce_event(await _json_body(request))
+    return await _add_history_core(evt, db, x_user_email)
 
 
 @router_compat.get("/history/recent")
-def recent_compat(db: Session = Depends(get_db), limit: int = Query(10, ge=1, le=200)):
-    return _recent(db, limit)
+async def recent_compat(db: AsyncSession = Depends(get_db), limit: int = Query(10, ge=1, le=list_cache.LIST_LIMIT_MAX)):
+    return await _recent(db, limit)
@@ -1,7 +1,8 @@
 # Unit test folder
 # backend/tests/test_app.py
+import pytest
 from fastapi.testclient import TestClient
-import os, sys
+import io, json, os, sys
 from app import app
 
 client = TestClient(app)
@@ -27,3 +28,185 @@ def test_analyze_local():
     body = resp.json()
     assert "client_insights" in body
     assert isinstance(body["client_insights"], list)
+
+def test_analyze_cache_revalidates_s3_etag(monkeypatch):
+    import app as A
+    csv_text = "client,revenue,cost,licenses_used,licenses_purchased\nAlphaTech,100,50,5,10\n"
+    state = {"etag": '"v1"', "text": csv_text}
+    seen = []
+
+    def fake_open(bucket, key, if_none_match=None):
+        seen.append(if_none_match)
+        if if_none_match == state["etag"]:
+            return None, state["etag"]  # 304 Not Modified
+        return io.StringIO(state["text"]), state["etag"]
+
+    monkeypatch.setattr(A, "open_s3_text_with_etag", fake_open)
+    A._analyze_cache.pop(("test-bucket", "billing.csv"))
+
+    rows1, ar1 = A._analyze_s3_object("test-bucket", "billing.csv")
+    rows2, ar2 = A._analyze_s3_object("test-bucket", "billing.csv")
+    assert seen == [None, '"v1"']
+    assert rows2 is rows1
+    assert ar2 is not ar1 and ar2.total_cost == 50
+
+    # callers assign onto their copy; the cached response must not change
+    ar1.meta = {"mutated": True}
+    _, ar3 = A._analyze_s3_object("test-bucket", "billing.csv")
+    assert ar3.meta is None
+
+    state.update(etag='"v2"', text=csv_text.replace(",50,", ",80,"))
+    _, ar4 = A._analyze_s3_object("test-bucket", "billing.csv")
+    assert ar4.total_cost == 80
+
+def test_analyze_cache_revalidates_local_file(tmp_path):
+    import app as A
+    path = tmp_path / "billing.csv"
+    path.write_text("client,revenue,cost,licenses_used,licenses_purchased\nAlphaTech,100,50,5,10\n")
+
+    rows1, ar1 = A._analyze_local_file(str(path))
+    rows2, ar2 = A._analyze_local_file(str(path))
+    assert rows2 is rows1 and ar2 is not ar1
+
+    path.write_text("client,revenue,cost,licenses_used,licenses_purchased\nAlphaTech,100,750,5,10\n")
+    rows3, ar3 = A._analyze_local_file(str(path))
+    assert rows3 is not rows1
+    assert ar3.total_cost == 750
+
+def _local_budgets(monkeypatch, tmp_path):
+    import app as A
+    monkeypatch.setattr(A, "use_s3", lambda: False)
+    monkeypatch.setattr(A, "_budgets_local_path",
+                        lambda sub, tenant, create=False: str(tmp_path / f"{sub}.json"))
+    return A
+
+def test_budgets_cache_revalidates_local_file(monkeypatch, tmp_path):
+    A = _local_budgets(monkeypatch, tmp_path)
+    assert A._save_budgets_for_user("u1", {"AlphaTech": 100}, None)
+
+    b1 = A._load_budgets_for_user("u1", None)
+    assert dict(b1) == {"AlphaTech": 100.0}
+    assert A._load_budgets_for_user("u1", None) is b1
+    with pytest.raises(TypeError):
+        b1["AlphaTech"] = 0.0  # cached mapping is shared, so read-only
+
+    assert A._save_budgets_for_user("u1", {"AlphaTech": 250, "BetaCorp": 10}, None)
+    assert dict(A._load_budgets_for_user("u1", None)) == {"AlphaTech": 250.0, "BetaCorp": 10.0}
+
+def test_budgets_cache_revalidates_s3_etag(monkeypatch):
+    import app as A
+    seen = []
+
+    def fake_open(bucket, key, if_none_match=None):
+        seen.append(if_none_match)
+        if if_none_match == '"b1"':
+            return None, '"b1"'
+        return io.StringIO('{"AlphaTech": 100, "bad": "x"}'), '"b1"'
+
+    monkeypatch.setattr(A, "use_s3", lambda: True)
+    monkeypatch.setattr(A, "open_s3_text_with_etag", fake_open)
+    A._budgets_cache.pop(("s3", A._s3_budgets_key("u-s3", None)))
+
+    b1 = A._load_budgets_for_user("u-s3", None)
+    assert dict(b1) == {"AlphaTech": 100.0}
+    assert A._load_budgets_for_user("u-s3", None) is b1
+    assert seen == [None, '"b1"']
+
+def test_budgets_save_is_atomic(monkeypatch, tmp_path):
+    A = _local_budgets(monkeypatch, tmp_path)
+    assert A._save_budgets_for_user("u1", {"AlphaTech": 100, "BetaCorp": -5, "bad": "x"}, None)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["u1.json"]
+    assert json.loads((tmp_path / "u1.json").read_text()) == {"AlphaTech": 100.0, "BetaCorp": 0.0}
+
+def test_budgets_save_failure_keeps_old_file(monkeypatch, tmp_path):
+    A = _local_budgets(monkeypatch, tmp_path)
+    assert A._save_budgets_for_user("u1", {"AlphaTech": 100}, None)
+
+    def boom(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(A.os, "replace", boom)
+    assert A._save_budgets_for_user("u1", {"AlphaTech": 999}, None) is False
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["u1.json"]
+    assert dict(A._load_budgets_for_user("u1", None)) == {"AlphaTech": 100.0}
+
+@pytest.fixture
+def s3_user(monkeypatch):
+    import app as A
+    monkeypatch.setattr(A, "use_s3", lambda: True)
+    monkeypatch.setenv("S3_BUCKET", "test-bucket")
+    monkeypatch.delenv("S3_UPLOAD_PREFIX", raising=False)
+    app.dependency_overrides[A.get_current_user] = lambda: {"sub": "alice"}
+    yield A
+    app.dependency_overrides.pop(A.get_current_user, None)
+
+def test_uploads_init_scopes_key_to_user(s3_user, monkeypatch):
+    monkeypatch.setattr(s3_user, "generate_presigned_put_url",
+                        lambda bucket, key, content_type, expires_in: f"https://s3.test/{key}")
+    resp = client.post("/uploads/init", json={"filename": "../../bob/evil.csv"})
+    assert resp.status_code == 200
+    key = resp.json()["key"]
+    assert key.startswith("uploads/alice/") and key.endswith("_evil.csv")
+    assert ".." not in key
+
+def test_upload_analyze_rejects_foreign_keys(s3_user, monkeypatch):
+    monkeypatch.setattr(s3_user, "open_s3_text_with_etag", lambda bucket, key, if_none_match=None: (
+        io.StringIO("client,revenue,cost,licenses_used,licenses_purchased\nAlphaTech,100,50,5,10\n"), None))
+    for key in ("uploads/bob/x.csv", "uploads/alice/../bob/x.csv", "billing_data.csv"):
+        assert client.post("/upload_analyze", json={"key": key}).status_code == 403
+    resp = client.post("/upload_analyze", json={"key": "uploads/alice/x.csv"})
+    assert resp.status_code == 200
+    assert resp.json()["stored_key"] == "uploads/alice/x.csv"
+
+def test_write_body_parse_errors():
+    for path in ("/api/actions/execute", "/api/history/add"):
+        assert client.post(path, content=b"{not json").status_code == 400
+        assert client.post(path, json=[1, 2]).status_code == 422
+
+def test_action_payload_validation():
+    from routers.actions_routes import _unwrap_envelope
+
+    a = _unwrap_envelope({"action": {"title": 42, "targets": ["AlphaTech", 7], "estImpact": "12.5"}})
+    assert a["title"] == "42" and a["targets"] == ["AlphaTech", "7"]
+    assert a["est_impact"] == 12.5 and a["source"] == "finops-agent"
+
+    for body in ({"targets": []},
+                 {"title": "x", "targets": {"a": 1}},
+                 {"title": "x", "targets": [{"a": 1}]},
+                 {"title": ["x"]},
+                 {"title": "x", "estImpact": "lots"}):
+        assert client.post("/api/actions/execute", json=body).status_code == 422
+
+def test_history_payload_coercion():
+    from routers.history_routes import _coerce_event
+
+    evt = _coerce_event({"event": {"kind": 1, "title": " hi ", "key": 2024}})
+    assert evt["kind"] == "1" and evt["message"] == "hi" and evt["key"] == "2024"
+    assert _coerce_event({})["kind"] == "event"
+    assert client.post("/api/history/add", json={"kind": {"a": 1}}).status_code == 422
+
+def test_claims_cache_expiry(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from utils import cognito_verify as cv
+
+    clock = {"now": 1_000_000.0}
+    calls = []
+
+    async def fake_verify(token):
+        calls.append(token)
+        return {"sub": "u1", "exp": clock["now"] + 60}
+
+    monkeypatch.setattr(cv, "time", SimpleNamespace(time=lambda: clock["now"]))
+    monkeypatch.setattr(cv, "verify_bearer", fake_verify)
+    monkeypatch.setattr(cv, "_claims_cache", cv.OrderedDict())
+
+    claims = asyncio.run(cv.verify_bearer_cached("tok"))
+    claims["sub"] = "mutated"  # callers get their own copy
+    assert asyncio.run(cv.verify_bearer_cached("tok"))["sub"] == "u1"
+    assert calls == ["tok"]
+
+    # cached only until the token's own exp (minus a small skew)
+    clock["now"] += 56
+    asyncio.run(cv.verify_bearer_cached("tok"))
+    assert calls == ["tok", "tok"]
@@ -1,7 +1,10 @@
 # backend/utils/cognito_verify.py
 import os
 import time
-from typing import Optional, Dict, Any
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 
 import httpx
 from jose import jwt
@@ -26,17 +29,37 @@ _cached_jwks: Optional[Dict[str, Any]] = None
 _cached_at: float = 0.0
 _CACHE_TTL = 3600  # seconds
 
+# one pooled client (keep-alive) for every JWKS refresh; closed on app shutdown
+_http: Optional[httpx.AsyncClient] = None
+_jwks_lock = asyncio.Lock()
+
+def _client() -> httpx.AsyncClient:
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(timeout=10)
+    return _http
+
+async def aclose_http() -> None:
+    """Close the shared JWKS client (wired to FastAPI shutdown)."""
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
 async def _get_jwks() -> Dict[str, Any]:
     """Fetch JWKS and cache for 1 hour."""
     global _cached_jwks, _cached_at
-    now = time.time()
-    if _cached_jwks and (now - _cached_at) < _CACHE_TTL:
+    if _cached_jwks and (time.time() - _cached_at) < _CACHE_TTL:
         return _cached_jwks
     if not JWKS_URL:
         raise HTTPException(status_code=500, detail="COGNITO_REGION or USER_POOL_ID not set")
-    try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.get(JWKS_URL)
+    async with _jwks_lock:
+        # another request may have refreshed while we waited on the lock
+        now = time.time()
+        if _cached_jwks and (now - _cached_at) < _CACHE_TTL:
+            return _cached_jwks
+        try:
+            r = await _client().get(JWKS_URL)
             r.raise_for_status()
             data = r.json()
             if "keys" not in data:
@@ -44,11 +67,11 @@ async def _get_jwks() -> Dict[str, Any]:
             _cached_jwks = data
             _cached_at = now
             return _cached_jwks
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to load JWKS from Cognito: {e}"
-        )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to load JWKS from Cognito: {e}"
+            )
 
 async def verify_bearer(token: str) -> Dict[str, Any]:
     """Verify a Cognito ID token (signature, issuer, audience, token_use)."""
@@ -86,3 +109,27 @@ async def verify_bearer(token: str) -> Dict[str, Any]:
         raise
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Token verification failed: {e}")
+
+# verified claims, keyed by sha256(token); skips re-decoding + RSA verify on repeat requests
+_CLAIMS_CACHE_MAX = 2048
+_CLAIMS_CACHE_TTL = 300  # seconds; never past the token's own exp
+_claims_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+async def verify_bearer_cached(token: str) -> Dict[str, Any]:
+    """verify_bearer with a small LRU of already-verified tokens."""
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    hit = _claims_cache.get(key)
+    if hit and hit[0] > now + 5:
+        _claims_cache.move_to_end(key)
+        return dict(hit[1])
+    claims = await verify_bearer(token)
+    try:
+        expires = min(float(claims["exp"]), now + _CLAIMS_CACHE_TTL)
+    except (KeyError, TypeError, ValueError):
+        return claims
+    _claims_cache[key] = (expires, claims)
+    _claims_cache.move_to_end(key)
+    while len(_claims_cache) > _CLAIMS_CACHE_MAX:
+        _claims_cache.popitem(last=False)
+    return dict(claims)
@@ -2,7 +2,13 @@
 import os
 import json
 import time
-from typing import Dict, List
+from typing import Dict, Iterator, List
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 EVENT_LOG = os.path.join(DATA_DIR, "history.jsonl")
@@ -18,22 +24,48 @@ def append_event(evt: Dict) -> bool:
     except Exception:
         return False
 
+def _iter_lines_reversed(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield the file's lines last-to-first, reading fixed-size chunks from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        while pos > 0:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + tail).split(b"\n")
+            tail = lines.pop(0)  # may be a partial line; completed by the next chunk
+            for line in reversed(lines):
+                yield line
+        yield tail
+
 def read_recent(limit: int = 100, etype: str | None = None) -> List[Dict]:
-    """Return most recent events (optionally filtered by type)."""
+    """
+    Return most recent events (optionally filtered by type), newest first by `ts`.
+    Assumes events are appended in time order: the file is read backwards and
+    reading stops after `limit` matches, so an out-of-order event earlier in
+    the file is not considered.
+    """
     items: List[Dict] = []
     if not os.path.exists(EVENT_LOG):
         return items
-    with open(EVENT_LOG, "r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                obj = json.loads(line.strip())
-                if not obj:
-                    continue
-                if etype and obj.get("type") != etype:
-                    continue
-                items.append(obj)
-            except Exception:
-                continue
-    # newest first
+    limit = max(1, limit)
+    for line in _iter_lines_reversed(EVENT_LOG):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = _loads(line)
+        except Exception:
+            continue
+        if not obj or not isinstance(obj, dict):
+            continue
+        if etype and obj.get("type") != etype:
+            continue
+        items.append(obj)
+        if len(items) >= limit:
+            break
+    # file order is already newest-first; the stable sort only fixes local skew
     items.sort(key=lambda x: x.get("ts", 0), reverse=True)
-    return items[: max(1, limit)]
+    return items
@@ -0,0 +1,117 @@
+# backend/utils/list_cache.py
+# Short-TTL Redis cache for the read-heavy list endpoints (/api/actions, /api/history/recent).
+# Without REDIS_URL (or redis installed) it can fall back to a per-process dict with a
+# shorter TTL. Writes invalidate only the local worker, so that fallback is only
+# correct with a single worker: it is on by default only when WEB_CONCURRENCY is 1
+# (LIST_CACHE_LOCAL_TTL overrides; 0 disables it). Run Redis for multiple workers.
+# Entries are the encoded JSON response body, so a hit is sent as-is (no decode/re-encode).
+
+import os
+import json
+import time
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from redis import asyncio as aioredis  # redis>=4.2 ships the former aioredis API
+except ImportError:
+    aioredis = None
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+logger = logging.getLogger("list-cache")
+
+REDIS_URL = os.getenv("REDIS_URL")
+LIST_CACHE_TTL = int(os.getenv("LIST_CACHE_TTL", "5"))
+KEY_PREFIX = "finops"
+
+_SINGLE_WORKER = int(os.getenv("WEB_CONCURRENCY", "1")) <= 1
+LIST_CACHE_LOCAL_TTL = float(os.getenv("LIST_CACHE_LOCAL_TTL", "3" if _SINGLE_WORKER else "0"))
+# list endpoints bound ?limit= to 1..LIST_LIMIT_MAX, so the key space is finite
+LIST_LIMIT_MAX = 200
+# local fallback holds at most this many bodies (oldest evicted first)
+LOCAL_MAX_ENTRIES = 64
+
+_redis = None
+# key -> (expires_at monotonic, JSON body)
+_local: Dict[str, Tuple[float, bytes]] = {}
+
+
+def _client():
+    global _redis
+    if _redis is None and aioredis is not None and REDIS_URL:
+        _redis = aioredis.from_url(REDIS_URL, socket_timeout=0.5)
+    return _redis
+
+
+def list_key(name: str, limit: int) -> str:
+    return f"{KEY_PREFIX}:{name}:{limit}"
+
+
+def _store_local(key: str, body: bytes) -> None:
+    """Drop expired entries, evict the oldest past LOCAL_MAX_ENTRIES, then store."""
+    now = time.monotonic()
+    for k in [k for k, (exp, _) in _local.items() if exp <= now]:
+        del _local[k]
+    _local.pop(key, None)  # re-insert at the end (dicts keep insertion order)
+    while len(_local) >= LOCAL_MAX_ENTRIES:
+        del _local[next(iter(_local))]
+    _local[key] = (now + LIST_CACHE_LOCAL_TTL, body)
+
+
+async def get_cached(key: str) -> Optional[bytes]:
+    r = _client()
+    if r is None:
+        hit = _local.get(key)
+        if hit is not None and time.monotonic() < hit[0]:
+            return hit[1]
+        return None
+    try:
+        raw = await r.get(key)
+    except Exception as e:
+        logger.warning("list cache GET failed: %s", e)
+        return None
+    return raw or None
+
+
+async def set_cached(key: str, value: Any) -> bytes:
+    """Encode value as JSON once, cache the bytes, and return them for the response."""
+    body = _dumps(value)
+    r = _client()
+    if r is None:
+        if LIST_CACHE_LOCAL_TTL > 0:
+            _store_local(key, body)
+        return body
+    try:
+        await r.setex(key, LIST_CACHE_TTL, body)
+    except Exception as e:
+        logger.warning("list cache SETEX failed: %s", e)
+    return body
+
+
+async def invalidate(name: str) -> None:
+    """Drop every cached page (all limits) of one list."""
+    r = _client()
+    if r is None:
+        prefix = f"{KEY_PREFIX}:{name}:"
+        for k in [k for k in _local if k.startswith(prefix)]:
+            _local.pop(k, None)
+        return
+    try:
+        # limit is bounded, so every page key is known: one DEL, no keyspace SCAN
+        await r.delete(*[list_key(name, n) for n in range(1, LIST_LIMIT_MAX + 1)])
+    except Exception as e:
+        logger.warning("list cache invalidate failed: %s", e)
+
+
+async def aclose() -> None:
+    global _redis
+    if _redis is not None:
+        close = getattr(_redis, "aclose", None) or _redis.close
+        _redis = None
+        await close()
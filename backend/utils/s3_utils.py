@@ -1,12 +1,21 @@
 # backend/utils/s3_utils.py
+import io
 import os
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, BinaryIO, TextIO, Tuple
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError, ProfileNotFound
 
+try:
+    import libpresign  # optional: native SigV4 presigner, much faster than boto3's signer
+except ImportError:
+    libpresign = None
+
 logger = logging.getLogger("finops-s3")
 
 
@@ -18,11 +27,24 @@ def use_s3() -> bool:
     return bool(os.environ.get("S3_BUCKET"))
 
 
+@lru_cache(maxsize=1)
+def _region() -> str:
+    """AWS_REGION, then AWS_DEFAULT_REGION, then us-east-1; env is read once per process."""
+    return os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-east-1"
+
+
+_sanitized = False
+
+
 def _sanitize_env_creds():
     """
     Prevent stale process-level AWS_* credentials from hijacking boto3.
-    This ONLY affects the current process (safe).
+    This ONLY affects the current process (safe), and runs once per process.
     """
+    global _sanitized
+    if _sanitized:
+        return
+    _sanitized = True
     stripped = []
     for k in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN"):
         if os.environ.get(k):
@@ -39,7 +61,7 @@ def _session():
     """
     _sanitize_env_creds()
     profile = os.getenv("AWS_PROFILE")
-    region = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-east-1"
+    region = _region()
     try:
         if profile:
             logger.info(f"Attempting AWS profile: {profile}")
@@ -51,15 +73,65 @@ def _session():
         return boto3.Session(region_name=region)
 
 
+# Shared by every helper: keepalive + a pool sized for the budgets/history fan-out.
+_S3_CONFIG = Config(
+    retries={"max_attempts": 3, "mode": "standard"},
+    tcp_keepalive=True,
+    max_pool_connections=int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50")),
+)
+_client = None
+_client_lock = threading.Lock()
+
+
 def _s3_client():
-    ses = _session()
-    return ses.client("s3", config=Config(retries={"max_attempts": 3}))
+    """
+    One client per process: boto3 clients are thread-safe once built, and
+    reusing one keeps its pooled (TLS) connections warm across calls.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _session().client("s3", config=_S3_CONFIG)
+    return _client
+
+
+def warm_s3_client() -> None:
+    """Build the shared client ahead of the first request (startup / Lambda INIT)."""
+    try:
+        _s3_client()
+    except Exception as e:
+        logger.warning("S3 client warm-up failed: %s", e)
+
+
+# (access_key, secret_key) once resolved; False when creds are temporary/unknown
+_STATIC_CREDS = None
+
+
+def _static_creds():
+    """
+    libpresign can't carry a session token, so it is only used with long-lived
+    static keys; role/SSO credentials (with a token) keep using boto3.
+    """
+    global _STATIC_CREDS
+    if _STATIC_CREDS is None:
+        try:
+            creds = _session().get_credentials()
+            frozen = creds.get_frozen_credentials() if creds else None
+        except Exception:
+            frozen = None
+        if frozen and frozen.access_key and frozen.secret_key and not frozen.token:
+            _STATIC_CREDS = (frozen.access_key, frozen.secret_key)
+        else:
+            _STATIC_CREDS = False
+    return _STATIC_CREDS or None
 
 
 def read_s3_file(bucket: str, key: str = "billing_data.csv") -> Optional[str]:
     """
     Read an object from S3 and return its content as UTF-8 text.
-    Returns None on any error.
+    Returns None on any error. Holds the whole object in memory (bytes, then
+    str); CSVs and other large payloads should stream via open_s3_text.
     """
     if not bucket:
         logger.error("S3 bucket not provided.")
@@ -82,6 +154,49 @@ def read_s3_file(bucket: str, key: str = "billing_data.csv") -> Optional[str]:
         return None
 
 
+def open_s3_text(bucket: str, key: str) -> Optional[TextIO]:
+    """
+    Open an S3 object as a streaming UTF-8 text file (decoded as it is read,
+    never fully buffered). Returns None if the object can't be opened.
+    """
+    if not bucket:
+        logger.error("S3 bucket not provided.")
+        return None
+    try:
+        obj = _s3_client().get_object(Bucket=bucket, Key=key)
+        return io.TextIOWrapper(obj["Body"], encoding="utf-8", newline="")
+    except Exception as e:
+        logger.error("Error opening S3 object %s/%s: %s", bucket, key, e, exc_info=True)
+        return None
+
+
+def open_s3_text_with_etag(
+    bucket: str, key: str, if_none_match: Optional[str] = None
+) -> Tuple[Optional[TextIO], Optional[str]]:
+    """
+    open_s3_text plus the object's ETag, as (stream, etag).
+    With if_none_match set and the object unchanged, S3 answers 304 without a
+    body and (None, if_none_match) is returned. (None, None) on any error.
+    """
+    if not bucket:
+        logger.error("S3 bucket not provided.")
+        return None, None
+    params = {"Bucket": bucket, "Key": key}
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    try:
+        obj = _s3_client().get_object(**params)
+        return io.TextIOWrapper(obj["Body"], encoding="utf-8", newline=""), obj.get("ETag")
+    except ClientError as e:
+        if if_none_match and e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+            return None, if_none_match
+        logger.error("Error opening S3 object %s/%s: %s", bucket, key, e, exc_info=True)
+        return None, None
+    except Exception as e:
+        logger.error("Error opening S3 object %s/%s: %s", bucket, key, e, exc_info=True)
+        return None, None
+
+
 def put_s3_object(
     bucket: str,
     key: str,
@@ -90,7 +205,10 @@ def put_s3_object(
 ) -> bool:
     """
     Write bytes to S3. Returns True on success.
+    Bodies of 8 MiB or more go multipart (parallel parts, per-part retry).
     """
+    if len(content_bytes) >= _MULTIPART_THRESHOLD:
+        return upload_s3_fileobj(bucket, key, io.BytesIO(content_bytes), content_type)
     try:
         s3 = _s3_client()
         s3.put_object(
@@ -106,10 +224,46 @@ def put_s3_object(
         return False
 
 
+# 8 MiB parts: only large uploads go multipart; parts upload on up to 10 threads
+_MULTIPART_THRESHOLD = 8 << 20
+_UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=_MULTIPART_THRESHOLD,
+    multipart_chunksize=_MULTIPART_THRESHOLD,
+    max_concurrency=10,
+)
+
+
+def upload_s3_fileobj(
+    bucket: str,
+    key: str,
+    fileobj: BinaryIO,
+    content_type: str = "application/octet-stream",
+) -> bool:
+    """
+    Stream a binary file object to S3 (multipart above 8 MiB) from its current
+    position, without reading it into memory first. Returns True on success.
+    """
+    try:
+        s3 = _s3_client()
+        s3.upload_fileobj(
+            fileobj, bucket, key,
+            ExtraArgs={"ContentType": content_type},
+            Config=_UPLOAD_TRANSFER_CONFIG,
+        )
+        logger.info("Streamed S3 object %s/%s", bucket, key)
+        return True
+    except Exception as e:
+        logger.error("Error writing S3 object %s/%s: %s", bucket, key, e, exc_info=True)
+        return False
+
+
 def list_s3_objects(bucket: str, prefix: str, max_keys: int = 100) -> List[Dict[str, Any]]:
     """
-    List objects under prefix. Returns a simplified list of dicts:
-    [{ key, size, last_modified }, ...]
+    List every object under prefix. Returns a simplified list of dicts:
+    [{ key, size, last_modified }, ...] with last_modified left as S3's
+    tz-aware UTC datetime (sortable as-is; the JSON encoder formats it).
+    max_keys is the page size, not a cap: callers sort the full listing by
+    last_modified (S3 lists in key order), so truncating would drop the newest.
     """
     try:
         s3 = _s3_client()
@@ -117,18 +271,38 @@ def list_s3_objects(bucket: str, prefix: str, max_keys: int = 100) -> List[Dict[
         items: List[Dict[str, Any]] = []
 
         for page in paginator.paginate(Bucket=bucket, Prefix=prefix, MaxKeys=max_keys):
-            for obj in page.get("Contents", []):
-                items.append({
-                    "key": obj.get("Key"),
+            items += [
+                {
+                    "key": obj["Key"],
                     "size": obj.get("Size"),
-                    "last_modified": obj.get("LastModified").isoformat() if obj.get("LastModified") else None,
-                })
+                    "last_modified": obj["LastModified"],
+                }
+                for obj in page.get("Contents", ())
+            ]
         return items
     except Exception as e:
         logger.error("Error listing S3 prefix %s/%s: %s", bucket, prefix, e, exc_info=True)
         return []
 
 
+def list_s3_keys(bucket: str, prefix: str, max_keys: int = 1000) -> List[str]:
+    """
+    Keys only under prefix: skips building the size/last_modified dicts when
+    callers just need names.
+    """
+    try:
+        s3 = _s3_client()
+        paginator = s3.get_paginator("list_objects_v2")
+        return [
+            obj["Key"]
+            for page in paginator.paginate(Bucket=bucket, Prefix=prefix, MaxKeys=max_keys)
+            for obj in page.get("Contents", ())
+        ]
+    except Exception as e:
+        logger.error("Error listing S3 prefix %s/%s: %s", bucket, prefix, e, exc_info=True)
+        return []
+
+
 def delete_s3_object(bucket: str, key: str) -> bool:
     """
     Delete a single object. Returns True on success.
@@ -148,6 +322,12 @@ def generate_presigned_get_url(bucket: str, key: str, expires_in: int = 900) ->
     Generate a presigned GET URL for an object.
     Returns the URL string or None on failure.
     """
+    creds = _static_creds() if libpresign is not None else None
+    if creds:
+        try:
+            return libpresign.get(creds[0], creds[1], _region(), bucket, key, int(expires_in))
+        except Exception as e:
+            logger.warning("libpresign failed for %s/%s, using boto3: %s", bucket, key, e)
     try:
         s3 = _s3_client()
         url = s3.generate_presigned_url(
@@ -161,6 +341,26 @@ def generate_presigned_get_url(bucket: str, key: str, expires_in: int = 900) ->
         return None
 
 
+def generate_presigned_put_url(
+    bucket: str, key: str, content_type: str = "text/csv", expires_in: int = 900
+) -> Optional[str]:
+    """
+    Generate a presigned PUT URL so a client can upload an object directly.
+    The Content-Type is part of the signature; the client must send the same one.
+    Returns the URL string or None on failure.
+    """
+    try:
+        s3 = _s3_client()
+        return s3.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": bucket, "Key": key, "ContentType": content_type},
+            ExpiresIn=int(expires_in),
+        )
+    except Exception as e:
+        logger.error("Error generating presigned PUT URL for %s/%s: %s", bucket, key, e, exc_info=True)
+        return None
+
+
 # --- New: wrapper expected by app.py (/history/presign) ---
 def get_presigned_url(bucket: str, key: str, expires: int = 300) -> str:
     """
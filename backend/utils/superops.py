@@ -3,13 +3,60 @@ import os
 import json
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # optional: faster encode/decode of action payloads
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger("finops-superops")
 
 SUPEROPS_BASE = os.getenv("SUPEROPS_BASE", "https://api.superops.ai")
 SUPEROPS_API_KEY = os.getenv("SUPEROPS_API_KEY")
 
+_session = None
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _superops_session() -> requests.Session:
+    """
+    One keep-alive Session per process (warm containers skip the TCP/TLS handshake).
+    POST is not idempotent, so only failed connects and 429/503 (not processed) retry.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=2, connect=2, read=0, status=2,
+            status_forcelist=(429, 503),
+            allowed_methods=frozenset({"POST"}),
+            backoff_factor=0.2,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=retry)
+        s = requests.Session()
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        s.headers.update({
+            "Authorization": f"Bearer {SUPEROPS_API_KEY}",
+            "Content-Type": "application/json",
+        })
+        _session = s
+    return _session
+
 def run_superops_action(action: Dict[str, Any]) -> Dict[str, Any]:
     """
     Send an action to SuperOps (if API key provided).
@@ -25,13 +72,10 @@ def run_superops_action(action: Dict[str, Any]) -> Dict[str, Any]:
     try:
         # NOTE: Replace with the actual SuperOps endpoint when available.
         url = f"{SUPEROPS_BASE.rstrip('/')}/v1/agent/actions"
-        headers = {
-            "Authorization": f"Bearer {SUPEROPS_API_KEY}",
-            "Content-Type": "application/json",
-        }
-        resp = requests.post(url, headers=headers, data=json.dumps(action), timeout=15)
+        # body pre-encoded; Content-Type comes from the session headers
+        resp = _superops_session().post(url, data=_dumps(action), timeout=15)
         resp.raise_for_status()
-        return {"mode": "live", "status": resp.status_code, "data": resp.json()}
+        return {"mode": "live", "status": resp.status_code, "data": _loads(resp.content)}
     except Exception as e:
         logger.exception("SuperOps call failed")
         return {"mode": "live", "error": str(e), "echo": action}
@@ -1,20 +1,55 @@
 # db.py — SQLAlchemy engine + session factory (no models here)
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 # Lambda can only write to /tmp. Allow override via env.
 _SQLITE_URL = os.getenv("SQLITE_URL", "sqlite:////tmp/finops.db")
 
-# SQLite pragmas for Lambda cold starts are fine at default isolation
 engine = create_engine(
     _SQLITE_URL,
     connect_args={"check_same_thread": False} if _SQLITE_URL.startswith("sqlite") else {},
     pool_pre_ping=True,
 )
 
+if _SQLITE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        # WAL: list reads don't block behind the action/history writer
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_tables_ready = False
+
+def ensure_tables() -> bool:
+    """
+    create_all once per process (run at app import; the startup hook retries it).
+    Failures (read-only FS) are swallowed and retried on the next call.
+    """
+    global _tables_ready
+    if not _tables_ready:
+        from models import Base  # models imports nothing from db; lazy to keep db model-free
+        try:
+            Base.metadata.create_all(bind=engine)
+            _tables_ready = True
+        except Exception:
+            pass
+        if _tables_ready:
+            # create_all skips existing tables; add indexes introduced since
+            # (best-effort: an older, differently shaped DB just goes without)
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    try:
+                        index.create(bind=engine, checkfirst=True)
+                    except Exception:
+                        pass
+    return _tables_ready
+
 # FastAPI dependency
 def get_db():
     db = SessionLocal()
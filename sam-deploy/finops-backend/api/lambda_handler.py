@@ -1,3 +1,8 @@
+import os
+
+# Credentials come from the Lambda env; skip botocore's IMDS probe on cold start
+os.environ.setdefault("AWS_EC2_METADATA_DISABLED", "true")
+
 from mangum import Mangum
 from app import app  # imports FastAPI instance from app.py
 
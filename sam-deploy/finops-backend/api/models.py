@@ -9,7 +9,7 @@ class ActionLog(Base):
     __tablename__ = "action_logs"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    time: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    time: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
     user: Mapped[str] = mapped_column(String(255), nullable=False)
     title: Mapped[str] = mapped_column(String(1024), nullable=False)
     targets: Mapped[str] = mapped_column(Text, nullable=True)
@@ -21,7 +21,7 @@ class HistoryEvent(Base):
     __tablename__ = "history_events"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    time: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    time: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
     user: Mapped[str] = mapped_column(String(255), nullable=False)
     kind: Mapped[str] = mapped_column(String(255), nullable=False)
     message: Mapped[str] = mapped_column(Text, nullable=False)
@@ -1,11 +1,12 @@
 # api/routers/actions_routes.py
 from typing import List, Optional, Union
-from fastapi import APIRouter, Depends, Header, Body
+from fastapi import APIRouter, Depends, Header, Body, Query, Response
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from db import get_db, engine
-from models import Base, ActionLog, HistoryEvent   # <-- Base from models
+from db import get_db
+from models import ActionLog, HistoryEvent
+from utils import list_cache
 
 router = APIRouter(prefix="/api/actions", tags=["actions"])
 router_compat = APIRouter(tags=["actions-compat"])
@@ -28,21 +29,7 @@ class ExecuteEnvelope(BaseModel):
 def _unwrap_envelope(payload: Union[ExecuteEnvelope, ActionPayload]) -> ActionPayload:
     return payload.action if isinstance(payload, ExecuteEnvelope) else payload
 
-_tables_ready = False
-def _ensure_tables():
-    global _tables_ready
-    if _tables_ready:
-        return
-    try:
-        Base.metadata.create_all(bind=engine)
-        _tables_ready = True
-    except Exception:
-        # don't break requests if create_all fails (read-only scenarios)
-        pass
-
 def _persist_action_and_history(action: ActionPayload, db: Session, x_user_email: Optional[str]):
-    _ensure_tables()
-
     user = action.user or x_user_email or "anonymous@demo.local"
     est = action.est_impact_usd if action.est_impact_usd is not None else action.estImpact
 
@@ -54,25 +41,29 @@ def _persist_action_and_history(action: ActionPayload, db: Session, x_user_email
         source=action.source or "finops-agent",
     )
     db.add(arow)
-    db.commit()
-    db.refresh(arow)
+    db.flush()  # assigns arow.id; both rows then go out in one commit
+    action_id = arow.id
 
+    # Best-effort history entry (savepoint, so a failure here keeps the action row)
     try:
         msg = f"Executed: {action.title}"
         if action.targets:
             msg += f" → {', '.join(action.targets)}"
-        h = HistoryEvent(user=user, kind="action_executed", message=msg, key=None)
-        db.add(h)
-        db.commit()
+        with db.begin_nested():
+            db.add(HistoryEvent(user=user, kind="action_executed", message=msg, key=None))
     except Exception:
-        db.rollback()
+        pass  # don't break the main request
+
+    db.commit()
+    list_cache.invalidate("actions")
+    list_cache.invalidate("history")
 
     return {
         "ok": True,
         "executed": True,
         "stored": True,
         "preview": False,
-        "actionId": arow.id,
+        "actionId": action_id,
         "superops_result": None,
     }
 
@@ -86,8 +77,14 @@ def execute_action(
     return _persist_action_and_history(action, db, x_user_email)
 
 @router.get("")
-def list_actions(db: Session = Depends(get_db), limit: int = 50):
-    _ensure_tables()
+def list_actions(
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=list_cache.LIST_LIMIT_MAX),
+):
+    cache_key = list_cache.list_key("actions", limit)
+    cached = list_cache.get_cached(cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
     q = db.query(ActionLog).order_by(ActionLog.time.desc()).limit(limit).all()
     items = []
     for r in q:
@@ -104,7 +101,9 @@ def list_actions(db: Session = Depends(get_db), limit: int = 50):
                 },
             }
         )
-    return {"items": items}
+    out = {"items": items}
+    body = list_cache.set_cached(cache_key, out)
+    return Response(body, media_type="application/json")
 
 @router_compat.post("/actions/execute")
 def execute_action_compat(
@@ -116,5 +115,8 @@ def execute_action_compat(
     return _persist_action_and_history(action, db, x_user_email)
 
 @router_compat.get("/actions")
-def list_actions_compat(db: Session = Depends(get_db), limit: int = 50):
+def list_actions_compat(
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=list_cache.LIST_LIMIT_MAX),
+):
     return list_actions(db=db, limit=limit)
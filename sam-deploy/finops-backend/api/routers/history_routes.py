@@ -1,32 +1,21 @@
 # api/routers/history_routes.py
 from typing import Optional
-from fastapi import APIRouter, Depends, Body, Header
+from fastapi import APIRouter, Depends, Body, Header, Query, Response
 from sqlalchemy.orm import Session
 
-from db import get_db, engine
-from models import Base, HistoryEvent
+from db import get_db
+from models import HistoryEvent
+from utils import list_cache
 
 router = APIRouter(prefix="/api/history", tags=["history"])
 router_compat = APIRouter(tags=["history-compat"])
 
-_tables_ready = False
-def _ensure_tables():
-    global _tables_ready
-    if _tables_ready:
-        return
-    try:
-        Base.metadata.create_all(bind=engine)
-        _tables_ready = True
-    except Exception:
-        pass
-
 @router.post("/add")
 def add_history(
     payload: dict = Body(...),
     db: Session = Depends(get_db),
     x_user_email: Optional[str] = Header(default=None),
 ):
-    _ensure_tables()
     user = x_user_email or "anonymous@demo.local"
     msg = payload.get("message") or payload.get("text") or "event"
     kind = payload.get("kind") or "event"
@@ -34,17 +23,39 @@ def add_history(
     ev = HistoryEvent(user=user, kind=kind, message=msg, key=key)
     db.add(ev)
     db.commit()
+    list_cache.invalidate("history")
     return {"ok": True, "id": ev.id}
 
 @router.get("")
-def list_history(db: Session = Depends(get_db)):
-    _ensure_tables()
-    rows = db.query(HistoryEvent).order_by(HistoryEvent.time.desc()).limit(200).all()
-    return {"items": [
-        {"id": r.id, "time": r.time.isoformat() if r.time else None,
-         "user": r.user, "kind": r.kind, "message": r.message, "key": r.key}
-        for r in rows
-    ]}
+def list_history(
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=list_cache.LIST_LIMIT_MAX),
+    after_id: Optional[int] = Query(None, description="keyset cursor: next_after_id of the previous page"),
+):
+    # only the first page is polled; deeper pages go straight to the PK index
+    cache_key = list_cache.list_key("history", limit) if after_id is None else None
+    if cache_key:
+        cached = list_cache.get_cached(cache_key)
+        if cached is not None:
+            return Response(cached, media_type="application/json")
+    q = db.query(HistoryEvent)
+    if after_id is not None:
+        q = q.filter(HistoryEvent.id < after_id)
+    # id is insertion order, so this matches time DESC and seeks on the PK
+    rows = q.order_by(HistoryEvent.id.desc()).limit(limit).all()
+    out = {
+        "items": [
+            {"id": r.id, "time": r.time.isoformat() if r.time else None,
+             "user": r.user, "kind": r.kind, "message": r.message, "key": r.key}
+            for r in rows
+        ],
+        "next_after_id": rows[-1].id if len(rows) == limit else None,
+    }
+    if cache_key:
+        body = list_cache.set_cached(cache_key, out)
+    else:
+        body = list_cache.encode(out)
+    return Response(body, media_type="application/json")
 
 # legacy routes
 @router_compat.post("/history/add")
@@ -52,5 +63,9 @@ def add_history_compat(payload: dict = Body(...), db: Session = Depends(get_db),
     return add_history(payload=payload, db=db, x_user_email=x_user_email)
 
 @router_compat.get("/history")
-def list_history_compat(db: Session = Depends(get_db)):
-    return list_history(db=db)
+def list_history_compat(
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=list_cache.LIST_LIMIT_MAX),
+    after_id: Optional[int] = Query(None),
+):
+    return list_history(db=db, limit=limit, after_id=after_id)
@@ -1,5 +1,6 @@
 # Unit test folder
 # backend/tests/test_app.py
+import pytest
 from fastapi.testclient import TestClient
 import os, sys
 from app import app
@@ -27,3 +28,59 @@ def test_analyze_local():
     body = resp.json()
     assert "client_insights" in body
     assert isinstance(body["client_insights"], list)
+
+@pytest.fixture
+def history_db(tmp_path):
+    # a throwaway SQLite file per test instead of the shared SQLITE_URL database
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from db import get_db
+    from models import Base
+    from utils import list_cache
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'finops.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def _get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    list_cache.invalidate("history")
+    yield
+    app.dependency_overrides.pop(get_db, None)
+    list_cache.invalidate("history")
+    engine.dispose()
+
+def _add_events(n):
+    return [client.post("/api/history/add", json={"kind": "test", "message": f"event {i}"}).json()["id"]
+            for i in range(n)]
+
+def test_history_keyset_pagination(history_db):
+    ids = _add_events(5)
+    first = client.get("/api/history?limit=2").json()
+    page_ids = [it["id"] for it in first["items"]]
+    assert page_ids == sorted(ids, reverse=True)[:2]
+    assert first["next_after_id"] == page_ids[-1]
+
+    second = client.get(f"/history?limit=2&after_id={first['next_after_id']}").json()
+    assert [it["id"] for it in second["items"]] == sorted(ids, reverse=True)[2:4]
+
+    # a short page ends the walk
+    tail = client.get(f"/api/history?limit=2&after_id={second['next_after_id']}").json()
+    assert [it["id"] for it in tail["items"]] == [min(ids)]
+    assert tail["next_after_id"] is None
+
+def test_history_default_page_size(history_db):
+    _add_events(55)
+    page = client.get("/api/history").json()
+    assert len(page["items"]) == 50
+    assert page["next_after_id"] == page["items"][-1]["id"]
+
+def test_history_limit_bounds():
+    assert client.get("/api/history?limit=0").status_code == 422
+    assert client.get("/history?limit=100000").status_code == 422
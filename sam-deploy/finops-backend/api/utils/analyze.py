@@ -1,34 +1,40 @@
 # Utility modules
 # Handles profitability analysis
 # backend/utils/analyze.py
-from typing import List, Dict
+from operator import itemgetter
+from typing import List, Dict, Tuple
 
-def analyze_csv_rows(rows: List[Dict[str, str]]):
-    """
-    Parse CSV rows representing billing data and return per-client insights
-    with margin calculation, license waste percentage, and a health tag.
+_by_margin = itemgetter("margin")
 
-    Expected CSV columns:
-        client, revenue, cost, licenses_used, licenses_purchased
+
+def _to_float(v) -> float:
+    try:
+        return float(v or 0)
+    except Exception:
+        return 0.0
+
+
+def analyze_csv_rows_with_totals(rows: List[Dict[str, str]]) -> Tuple[List[Dict], float, float]:
+    """
+    analyze_csv_rows plus the unrounded revenue/cost totals, accumulated in
+    the same pass so callers don't parse every row's numbers a second time.
     """
     insights = []
+    append = insights.append
+    total_revenue = total_cost = 0.0
 
     for r in rows:
-        client = (r.get("client") or r.get("name") or "Unknown").strip()
+        get = r.get
+        client = (get("client") or get("name") or "Unknown").strip()
 
-        try:
-            revenue = float(r.get("revenue", 0) or 0)
-        except Exception:
-            revenue = 0.0
+        revenue = _to_float(get("revenue"))
+        cost = _to_float(get("cost"))
+        total_revenue += revenue
+        total_cost += cost
 
         try:
-            cost = float(r.get("cost", 0) or 0)
-        except Exception:
-            cost = 0.0
-
-        try:
-            licenses_used = float(r.get("licenses_used", 0) or 0)
-            licenses_purchased = float(r.get("licenses_purchased", 0) or 0)
+            licenses_used = float(get("licenses_used") or 0)
+            licenses_purchased = float(get("licenses_purchased") or 0)
         except Exception:
             licenses_used = 0.0
             licenses_purchased = 0.0
@@ -49,7 +55,7 @@ def analyze_csv_rows(rows: List[Dict[str, str]]):
         elif license_waste_pct > 30:
             health = "Inefficient"
 
-        insights.append({
+        append({
             "client": client,
             "revenue": round(revenue, 2),
             "cost": round(cost, 2),
@@ -59,5 +65,16 @@ def analyze_csv_rows(rows: List[Dict[str, str]]):
         })
 
     # Sort by margin ascending so low-margin/at-risk clients appear first
-    insights_sorted = sorted(insights, key=lambda x: x["margin"])
-    return insights_sorted
+    insights.sort(key=_by_margin)
+    return insights, total_revenue, total_cost
+
+
+def analyze_csv_rows(rows: List[Dict[str, str]]):
+    """
+    Parse CSV rows representing billing data and return per-client insights
+    with margin calculation, license waste percentage, and a health tag.
+
+    Expected CSV columns:
+        client, revenue, cost, licenses_used, licenses_purchased
+    """
+    return analyze_csv_rows_with_totals(rows)[0]
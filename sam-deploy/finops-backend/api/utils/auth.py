@@ -17,9 +17,10 @@ REQUIRE_AUTH = os.getenv("REQUIRE_AUTH", "false").lower() in ("1", "true", "yes"
 
 _jwks_cache: Dict[str, Any] = {}
 _jwks_expiry: float = 0.0
+_key_cache: Dict[str, Any] = {}  # kid -> constructed public key; reset with the JWKS
 
 def _get_jwks() -> Optional[Dict[str, Any]]:
-    global _jwks_cache, _jwks_expiry
+    global _jwks_cache, _jwks_expiry, _key_cache
     if not COGNITO_JWKS_URL:
         return None
     now = time.time()
@@ -36,6 +37,7 @@ def _get_jwks() -> Optional[Dict[str, Any]]:
         r.raise_for_status()
         _jwks_cache = r.json()
         _jwks_expiry = now + 3600
+        _key_cache = {}
         return _jwks_cache
     except Exception as e:
         logger.warning("JWKS fetch failed: %s", e)
@@ -78,12 +80,15 @@ def cognito_optional_user(authorization: Optional[str] = Header(default=None)) -
             if REQUIRE_AUTH:
                 raise HTTPException(status_code=401, detail="JWKS unavailable")
             return {"sub": "anonymous-unverified"}
-        keys = jwks.get("keys", [])
-        key = next((k for k in keys if k.get("kid") == kid), None)
-        if not key:
-            raise HTTPException(status_code=401, detail="Signing key not found")
+        public_key = _key_cache.get(kid)
+        if public_key is None:
+            keys = jwks.get("keys", [])
+            key = next((k for k in keys if k.get("kid") == kid), None)
+            if not key:
+                raise HTTPException(status_code=401, detail="Signing key not found")
+            public_key = jwk.construct(key)
+            _key_cache[kid] = public_key
 
-        public_key = jwk.construct(key)
         message, encoded_sig = token.rsplit(".", 1)
         decoded_sig = base64url_decode(encoded_sig.encode("utf-8"))
         if not public_key.verify(message.encode("utf-8"), decoded_sig):
@@ -3,12 +3,23 @@
 
 import os
 import json
+import time
+import random
 import logging
+import threading
+from functools import partial
 from typing import Tuple, Optional
 
+import anyio
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, UnknownServiceError, NoRegionError
 
+try:
+    import orjson  # optional: faster encode/decode of Bedrock payloads
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("bedrock-client")
 
 MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0")
@@ -21,17 +32,75 @@ REGION = (
 AWS_PROFILE = os.getenv("AWS_PROFILE")
 
 
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+# botocore clients are thread-safe and costly to build (service-model parsing),
+# so one per process is shared by every request.
+_BEDROCK_CONFIG = Config(tcp_keepalive=True)
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
 def _bedrock_client():
     """
-    Create a Bedrock Runtime client honoring AWS_PROFILE (SSO) if set.
+    Return the shared Bedrock Runtime client, honoring AWS_PROFILE (SSO) if set.
+    """
+    global _CLIENT
+    if _CLIENT is not None:
+        return _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            if AWS_PROFILE:
+                logger.info("Attempting AWS profile: %s", AWS_PROFILE)
+                session = boto3.Session(profile_name=AWS_PROFILE, region_name=REGION)
+            else:
+                session = boto3.Session(region_name=REGION)
+            # Will raise UnknownServiceError if botocore is too old or region not supported
+            _CLIENT = session.client("bedrock-runtime", config=_BEDROCK_CONFIG)
+    return _CLIENT
+
+
+# Cap in-flight Bedrock calls per process so bursts queue here instead of
+# tripping AWS throttling and tying up every worker thread. This is the only
+# limiter: async routes reach invoke_model through to_thread, so sync and async
+# callers share the one BEDROCK_MAX_INFLIGHT budget.
+BEDROCK_MAX_INFLIGHT = int(os.getenv("BEDROCK_MAX_INFLIGHT", "8"))
+BEDROCK_THROTTLE_RETRIES = int(os.getenv("BEDROCK_THROTTLE_RETRIES", "3"))
+_BEDROCK_SEM = threading.BoundedSemaphore(BEDROCK_MAX_INFLIGHT)
+
+_THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException"}
+
+
+def _is_throttled(e: ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") in _THROTTLE_CODES
+
+
+def _backoff_delay(attempt: int) -> float:
+    # exponential with full jitter: 0..(0.5s * 2^attempt), capped at 8s
+    return random.uniform(0, min(8.0, 0.5 * (2 ** attempt)))
+
+
+def warm_bedrock_client() -> None:
+    """
+    Build the shared client ahead of the first request, so startup /
+    Lambda INIT pays for it instead of a user call.
     """
-    if AWS_PROFILE:
-        logger.info("Attempting AWS profile: %s", AWS_PROFILE)
-        session = boto3.Session(profile_name=AWS_PROFILE, region_name=REGION)
-    else:
-        session = boto3.Session(region_name=REGION)
-    # Will raise UnknownServiceError if botocore is too old or region not supported
-    return session.client("bedrock-runtime")
+    try:
+        _bedrock_client()
+    except Exception as e:
+        logger.warning("Bedrock client warm-up failed: %s", e)
+
+
+_JSON_MODE_TOKENS = ("claude-3-5", "sonnet-20241022", "haiku-20241022")
 
 
 def _supports_json_mode(model_id: str) -> bool:
@@ -40,7 +109,11 @@ def _supports_json_mode(model_id: str) -> bool:
     (e.g., Claude 3.5 family). Claude 3 Sonnet 20240229 generally rejects response_format.
     """
     m = model_id.lower()
-    return ("claude-3-5" in m) or ("sonnet-20241022" in m) or ("haiku-20241022" in m)
+    return any(tok in m for tok in _JSON_MODE_TOKENS)
+
+
+# MODEL_ID is fixed for the process, so resolve JSON-mode support once.
+_JSON_MODE_OK = _supports_json_mode(MODEL_ID)
 
 
 def _build_messages_body(prompt: str, max_tokens: int, use_json_mode: bool) -> dict:
@@ -62,7 +135,7 @@ def _build_messages_body(prompt: str, max_tokens: int, use_json_mode: bool) -> d
         ),
         "temperature": 0.2,
     }
-    if use_json_mode and _supports_json_mode(MODEL_ID):
+    if use_json_mode and _JSON_MODE_OK:
         body["response_format"] = {"type": "json_object"}
     return body
 
@@ -76,9 +149,7 @@ def _parse_bedrock_response(resp) -> str:
     raw = resp["body"]
     if hasattr(raw, "read"):
         raw = raw.read()
-    if isinstance(raw, bytes):
-        raw = raw.decode("utf-8")
-    payload = json.loads(raw)
+    payload = _loads(raw)
 
     blocks = payload.get("content")
     if isinstance(blocks, list):
@@ -93,7 +164,7 @@ def _parse_bedrock_response(resp) -> str:
             if blk.get("type") == "text":
                 return blk.get("text", "").strip()
 
-    return json.dumps(payload)
+    return _dumps(payload).decode("utf-8")
 
 
 def get_ai_recommendation(
@@ -122,15 +193,24 @@ def get_ai_recommendation(
 
     def _invoke(use_json: bool) -> Tuple[str, str]:
         body = _build_messages_body(prompt, max_tokens, use_json)
-        # Bedrock expects bytes for body
-        resp = client.invoke_model(
-            modelId=MODEL_ID,
-            body=json.dumps(body).encode("utf-8"),
-            contentType="application/json",
-            accept="application/json",
-        )
-        txt = _parse_bedrock_response(resp)
-        return txt, ("bedrock-json" if use_json else "bedrock")
+        for attempt in range(BEDROCK_THROTTLE_RETRIES + 1):
+            try:
+                with _BEDROCK_SEM:
+                    # Bedrock expects bytes for body
+                    resp = client.invoke_model(
+                        modelId=MODEL_ID,
+                        body=_dumps(body),
+                        contentType="application/json",
+                        accept="application/json",
+                    )
+                    txt = _parse_bedrock_response(resp)
+                return txt, ("bedrock-json" if use_json else "bedrock")
+            except ClientError as e:
+                if not _is_throttled(e) or attempt == BEDROCK_THROTTLE_RETRIES:
+                    raise
+                delay = _backoff_delay(attempt)
+                logger.warning("Bedrock throttled; retrying in %.2fs", delay)
+                time.sleep(delay)
 
     try:
         # First attempt (possibly JSON mode)
@@ -143,6 +223,13 @@ def get_ai_recommendation(
         raise
 
 
+def _json_or_raw(out: str, src: str):
+    try:
+        return _loads(out), src
+    except Exception:
+        return {"_raw": out}, src
+
+
 def get_ai_json(prompt: str, max_tokens: int = 600, retries: int = 1):
   """
   Attempts to obtain JSON. If Bedrock is unavailable or output isn't JSON,
@@ -154,11 +241,7 @@ def get_ai_json(prompt: str, max_tokens: int = 600, retries: int = 1):
       out, src = get_ai_recommendation(
           prompt, max_tokens=max_tokens, json_mode=use_json_mode
       )
-      try:
-          js = json.loads(out)
-          return js, src
-      except Exception:
-          return {"_raw": out}, src
+      return _json_or_raw(out, src)
 
   try:
       js, src = _try(True)
@@ -178,3 +261,14 @@ def get_ai_json(prompt: str, max_tokens: int = 600, retries: int = 1):
               return None, "bedrock-error"
       logger.exception("get_ai_json fatal.")
       return None, "bedrock-error"
+
+
+async def get_ai_json_async(prompt: str, max_tokens: int = 600, retries: int = 1):
+  """
+  get_ai_json for async routes: the blocking Bedrock call runs on a worker
+  thread so the event loop keeps serving other requests. Callers need the
+  whole JSON object, so the response is not streamed.
+  """
+  return await anyio.to_thread.run_sync(
+      partial(get_ai_json, prompt, max_tokens=max_tokens, retries=retries)
+  )
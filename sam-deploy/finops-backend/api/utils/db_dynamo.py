@@ -1,88 +1,211 @@
 # backend/utils/db_dynamo.py
+# NOTE: nothing imports this module today -- the app and routers use SQLite
+# (db.py) and write the DynamoDB audit copy through utils/ddb.py. It is kept as
+# a DynamoDB-backed action/history store, unused until a router is moved onto it.
 import os
 import json
+import heapq
+from itertools import islice
 import boto3
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from decimal import Decimal
 
 _DDB_TABLE = os.environ.get("DDB_TABLE")
 _DDB_REGION = os.environ.get("DDB_REGION") or os.environ.get("AWS_REGION")
 
 _session = boto3.session.Session(region_name=_DDB_REGION)
-_dynamo = _session.resource("dynamodb") if _DDB_TABLE else None
+# one keepalive resource per process: puts/scans reuse the pooled TLS connection
+_DDB_CONFIG = Config(
+    parameter_validation=False,
+    connect_timeout=1,
+    read_timeout=30,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 4},
+    max_pool_connections=32,
+)
+_dynamo = _session.resource("dynamodb", config=_DDB_CONFIG) if _DDB_TABLE else None
 _table = _dynamo.Table(_DDB_TABLE) if _dynamo else None
+# plain client for single puts: marshalled once here, no resource-layer wrapping
+_client = _session.client("dynamodb", config=_DDB_CONFIG) if _DDB_TABLE else None
+_serialize = TypeSerializer().serialize
+
+# Parallel Scan segments for query_recent (capped to stay clear of throttling)
+_SCAN_SEGMENTS = max(1, min(16, int(os.environ.get("DDB_SCAN_SEGMENTS", "4"))))
+_SCAN_BUDGET = 500
+
+# Optional GSI (PK GSI2PK = "TYPE#<Type>", SK GSI2SK = <ISO time>, projection ALL).
+# When set, query_recent does one keyed Query per type instead of the Scan.
+_RECENT_INDEX = os.environ.get("DDB_RECENT_INDEX", "")
+_RECENT_TYPES = ("ActionLog", "HistoryEvent")
 
 def table():
     if not _table:
         raise RuntimeError("DynamoDB table not configured. Set DDB_TABLE/DDB_REGION.")
     return _table
 
+def _new_id() -> str:
+    # 128 random bits as 32 hex chars: same entropy as uuid4, no UUID object or dashes
+    return os.urandom(16).hex()
+
 def now_iso():
     return datetime.now(timezone.utc).isoformat()
 
-def put_action(user: str, title: str, targets, est_impact, source: str):
+def _number(v):
+    # the resource layer rejects Python floats; Decimal(str()) keeps the printed value
+    return Decimal(str(float(v))) if v is not None else None
+
+def _action_item(user: str, title: str, targets, est_impact, source: str):
     """
-    Persist an action log. Item shape:
-      PK: ACTION#<uuid>
+    (id, item) for an action log. Item shape:
+      PK: ACTION#<id>
       SK: <ISO time>
       GSI1PK: USER#<email>
       GSI1SK: <ISO time>
-      payload: original fields
+      GSI2PK: TYPE#ActionLog
+      GSI2SK: <ISO time>
+    The fields are stored once, top-level; query_recent rebuilds `payload`.
     """
-    import uuid
-    t = table()
-    action_id = str(uuid.uuid4())
+    action_id = _new_id()
+    ts = now_iso()
+    impact = _number(est_impact)
+    targets = targets or []
+    source = source or "finops-agent"
     item = {
         "PK": f"ACTION#{action_id}",
-        "SK": now_iso(),
+        "SK": ts,
         "Type": "ActionLog",
         "user": user,
         "title": title,
-        "targets": targets or [],
-        "est_impact": float(est_impact) if est_impact is not None else None,
-        "source": source or "finops-agent",
-        "payload": {
-            "user": user,
-            "title": title,
-            "targets": targets or [],
-            "est_impact": float(est_impact) if est_impact is not None else None,
-            "source": source or "finops-agent",
-        },
+        "targets": targets,
+        "source": source,
         "GSI1PK": f"USER#{user}",
-        "GSI1SK": f"ACTION#{action_id}#{now_iso()}",
+        "GSI1SK": f"ACTION#{action_id}#{ts}",
+        "GSI2PK": "TYPE#ActionLog",
+        "GSI2SK": ts,
     }
-    # remove None (DynamoDB can’t store None)
-    item = {k: v for k, v in item.items() if v is not None}
-    t.put_item(Item=item)
-    return {"id": action_id, "time": item["SK"]}
+    # top-level attributes are omitted rather than stored as None
+    if impact is not None:
+        item["est_impact"] = impact
+    return action_id, item
 
-def put_history(user: str, kind: str, message: str, key: str|None = None):
-    import uuid
-    t = table()
-    event_id = str(uuid.uuid4())
+def _history_item(user: str, kind: str, message: str, key: str|None = None):
+    event_id = _new_id()
+    ts = now_iso()
     item = {
         "PK": f"HIST#{event_id}",
-        "SK": now_iso(),
+        "SK": ts,
         "Type": "HistoryEvent",
         "user": user,
         "kind": kind or "event",
         "message": message,
-        "key": key,
         "GSI1PK": f"USER#{user}",
-        "GSI1SK": f"HIST#{event_id}#{now_iso()}",
+        "GSI1SK": f"HIST#{event_id}#{ts}",
+        "GSI2PK": "TYPE#HistoryEvent",
+        "GSI2SK": ts,
     }
-    item = {k: v for k, v in item.items() if v is not None}
-    t.put_item(Item=item)
+    if key is not None:
+        item["key"] = key
+    return event_id, item
+
+def _marshal(item: dict) -> dict:
+    return {k: _serialize(v) for k, v in item.items()}
+
+def _put_item(item: dict):
+    table()  # raises if DDB_TABLE is not configured
+    _client.put_item(TableName=_DDB_TABLE, Item=_marshal(item))
+
+def put_action(user: str, title: str, targets, est_impact, source: str):
+    action_id, item = _action_item(user, title, targets, est_impact, source)
+    _put_item(item)
+    return {"id": action_id, "time": item["SK"]}
+
+def put_history(user: str, kind: str, message: str, key: str|None = None):
+    event_id, item = _history_item(user, kind, message, key)
+    _put_item(item)
     return {"id": event_id, "time": item["SK"]}
 
-def query_recent(limit: int = 50):
+# What list views read (payload is rebuilt from these); GSI keys etc. stay
+# server-side. Names are aliased since several are DynamoDB reserved words.
+_RECENT_ATTRS = ("PK", "SK", "Type", "user", "title", "targets", "est_impact", "source", "kind", "message", "key")
+_PROJECTION = {
+    "ProjectionExpression": ", ".join(f"#p{i}" for i in range(len(_RECENT_ATTRS))),
+    "ExpressionAttributeNames": {f"#p{i}": a for i, a in enumerate(_RECENT_ATTRS)},
+}
+
+def _scan_segment(segment: int, full: bool = False):
+    # the resource's client (thread-safe, unlike the Table; still (de)serializes values)
+    client = table().meta.client
+    share = -(-_SCAN_BUDGET // _SCAN_SEGMENTS)
+    extra = {"ExpressionAttributeNames": {"#t": "Type"}}
+    if not full:
+        extra["ProjectionExpression"] = _PROJECTION["ProjectionExpression"]
+        extra["ExpressionAttributeNames"].update(_PROJECTION["ExpressionAttributeNames"])
+    items = []
+    # Limit caps items *evaluated* (before the filter), so keep paging until
+    # this segment has its share of matching rows or runs out
+    while len(items) < share:
+        resp = client.scan(
+            TableName=_DDB_TABLE,
+            Segment=segment,
+            TotalSegments=_SCAN_SEGMENTS,
+            Limit=share,
+            # filter server-side so other item types never cross the wire
+            FilterExpression="#t IN (:a, :h)",
+            ExpressionAttributeValues={":a": "ActionLog", ":h": "HistoryEvent"},
+            **extra,
+        )
+        items.extend(resp.get("Items", []))
+        start = resp.get("LastEvaluatedKey")
+        if not start:
+            break
+        extra["ExclusiveStartKey"] = start
+    return items
+
+def _query_type(item_type: str, limit: int, full: bool = False):
+    # newest first straight from the index: reads O(limit) items, no sort needed
+    resp = table().meta.client.query(
+        TableName=_DDB_TABLE,
+        IndexName=_RECENT_INDEX,
+        KeyConditionExpression="GSI2PK = :pk",
+        ExpressionAttributeValues={":pk": f"TYPE#{item_type}"},
+        ScanIndexForward=False,
+        Limit=limit,
+        **({} if full else _PROJECTION),
+    )
+    return resp.get("Items", [])
+
+_PAYLOAD_FIELDS = ("user", "title", "targets", "est_impact", "source")
+
+def _with_payload(item):
+    # ActionLog items no longer carry a nested copy of their fields; rebuild it for readers
+    if item.get("Type") == "ActionLog" and "payload" not in item:
+        item["payload"] = {f: item.get(f) for f in _PAYLOAD_FIELDS}
+    return item
+
+def query_recent(limit: int = 50, full: bool = False):
     """
-    Simple recent scan. If you added GSIs, you can switch this to a keyed Query.
+    Newest ActionLog/HistoryEvent items. Uses the DDB_RECENT_INDEX GSI when
+    configured (items written before GSI2 attributes existed are not in it),
+    else a parallel Scan. Only the list-view attributes are fetched unless
+    full=True.
     """
-    t = table()
-    # Small table in hackathon setting → Scan + sort in code
-    resp = t.scan(Limit=500)
-    items = resp.get("Items", [])
-    # Filter only our types, sort by SK desc
-    items = [x for x in items if x.get("Type") in ("ActionLog", "HistoryEvent")]
-    items.sort(key=lambda x: x.get("SK", ""), reverse=True)
-    return items[:limit]
+    table()
+    if _RECENT_INDEX:
+        with ThreadPoolExecutor(max_workers=len(_RECENT_TYPES)) as pool:
+            parts = list(pool.map(lambda t: _query_type(t, limit, full), _RECENT_TYPES))
+        # each part is already SK-descending: merge, don't sort
+        merged = heapq.merge(*parts, key=lambda x: x.get("SK", ""), reverse=True)
+        return [_with_payload(x) for x in islice(merged, limit)]
+    # Small table in hackathon setting → Scan + sort in code; the segments of a
+    # parallel Scan run concurrently, so wall time is ~one round trip
+    if _SCAN_SEGMENTS == 1:
+        items = _scan_segment(0, full)
+    else:
+        with ThreadPoolExecutor(max_workers=_SCAN_SEGMENTS) as pool:
+            parts = pool.map(lambda seg: _scan_segment(seg, full), range(_SCAN_SEGMENTS))
+            items = [x for part in parts for x in part]
+    # newest first by SK
+    return [_with_payload(x) for x in heapq.nlargest(limit, items, key=lambda x: x.get("SK", ""))]
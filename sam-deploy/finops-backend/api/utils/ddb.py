@@ -2,15 +2,55 @@
 import os
 import boto3
 import logging
+import threading
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
 from decimal import Decimal
+from functools import lru_cache
 
 logger = logging.getLogger("finops-ddb")
 
+# keepalive so repeated puts reuse the pooled TLS connection
+_DDB_CONFIG = Config(
+    parameter_validation=False,
+    connect_timeout=1,
+    read_timeout=30,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 4},
+    max_pool_connections=32,
+)
+
+@lru_cache(maxsize=1024)
+def _float_to_decimal(f: float) -> Decimal:
+    return Decimal(str(f))
+
 def _to_decimal(obj):
     """
     Recursively convert floats to Decimal (DynamoDB does not accept float).
-    Also ensures lists/dicts are traversed.
+    Also ensures lists/dicts are traversed. Containers without floats are
+    returned as-is; new dicts/lists are only built along paths that changed.
     """
+    t = type(obj)
+    if t is float:
+        return _float_to_decimal(obj)
+    if t is dict:
+        out = None
+        for k, v in obj.items():
+            nv = _to_decimal(v)
+            if nv is not v:
+                if out is None:
+                    out = dict(obj)
+                out[k] = nv
+        return obj if out is None else out
+    if t is list:
+        out = None
+        for i, v in enumerate(obj):
+            nv = _to_decimal(v)
+            if nv is not v:
+                if out is None:
+                    out = list(obj)
+                out[i] = nv
+        return obj if out is None else out
     if isinstance(obj, float):
         return Decimal(str(obj))
     if isinstance(obj, dict):
@@ -19,7 +59,7 @@ def _to_decimal(obj):
         return [_to_decimal(x) for x in obj]
     return obj
 
-def _make_ddb_resource():
+def _make_ddb_client():
     # Priority: DDB_REGION > AWS_REGION > AWS_DEFAULT_REGION > us-east-1
     region = (
         os.getenv("DDB_REGION")
@@ -33,20 +73,36 @@ def _make_ddb_resource():
     if profile:
         logger.info("[ddb] using profile=%s region=%s", profile, region)
         session = boto3.Session(profile_name=profile, region_name=region)
-        return session.resource("dynamodb", region_name=region)
     else:
         logger.info("[ddb] using default creds region=%s", region)
-        return boto3.resource("dynamodb", region_name=region)
+        session = boto3.Session(region_name=region)
+    return session.client("dynamodb", region_name=region, config=_DDB_CONFIG)
+
+# Low-level client rather than resource().Table(): clients are thread-safe, so
+# one per process serves every thread, and puts skip the resource layer's
+# per-call wrapping. Items are marshalled here with a single TypeSerializer.
+_client = None
+_client_lock = threading.Lock()
+_serialize = TypeSerializer().serialize
+
+def _ddb_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _make_ddb_client()
+    return _client
+
+def _marshal(item: dict) -> dict:
+    return {k: _serialize(v) for k, v in item.items()}
 
 def put_action_item(table_name: str, item: dict) -> str | None:
     """
     Put an action event into DynamoDB. Returns the item id on success, else None.
     """
     try:
-        ddb = _make_ddb_resource()
-        table = ddb.Table(table_name)
         safe_item = _to_decimal(item)
-        table.put_item(Item=safe_item)
+        _ddb_client().put_item(TableName=table_name, Item=_marshal(safe_item))
         return str(item.get("id"))
     except Exception as e:
         logger.error("DDB put_item failed: %s", e, exc_info=True)
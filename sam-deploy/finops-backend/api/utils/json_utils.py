@@ -1,7 +1,13 @@
 # backend/utils/json_utils.py
 import json
 import re
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
 
 FENCE = re.compile(r"```(?:json)?(.*?)```", re.DOTALL | re.IGNORECASE)
 
@@ -9,31 +15,57 @@ def extract_json(text: str) -> Optional[Any]:
     """
     Try to coerce JSON from LLM output:
     - fenced ```json blocks
-    - first {...} or [...]
+    - first balanced {...} or [...]
     """
     if not text:
         return None
 
-    m = FENCE.search(text)
-    if m:
-        try:
-            return json.loads(m.group(1).strip())
-        except Exception:
-            pass
+    if "```" in text:
+        m = FENCE.search(text)
+        if m:
+            try:
+                return _loads(m.group(1).strip())
+            except Exception:
+                pass
 
-    # fallback: find first balanced { } or [ ]
-    brace = _slice_brackets(text, "{", "}")
-    if brace:
+    # fallback: one scan for the first balanced { } or [ ]. A leading [...] is
+    # only taken when the text has no { at all, so prose like "see [1]" ahead
+    # of the object can't shadow it ({...} is preferred, as before).
+    span = _find_first_balanced(text)
+    if span and (span[2] == "{" or "{" not in text):
+        start, end, _ = span
         try:
-            return json.loads(brace)
-        except Exception:
-            pass
-    brack = _slice_brackets(text, "[", "]")
-    if brack:
-        try:
-            return json.loads(brack)
+            return _loads(text[start:end])
         except Exception:
             pass
+
+    # rare: first span wasn't JSON; try each bracket kind on its own
+    for open_c, close_c in (("{", "}"), ("[", "]")):
+        sliced = _slice_brackets(text, open_c, close_c)
+        if sliced:
+            try:
+                return _loads(sliced)
+            except Exception:
+                pass
+    return None
+
+def _find_first_balanced(s: str) -> Optional[Tuple[int, int, str]]:
+    """Return (start, end, kind) of the first balanced {...} or [...] span, scanning once."""
+    b, k = s.find("{"), s.find("[")
+    if b == -1 and k == -1:
+        return None
+    start = k if b == -1 or (k != -1 and k < b) else b
+    open_c = s[start]
+    close_c = "}" if open_c == "{" else "]"
+    depth = 0
+    for i in range(start, len(s)):
+        ch = s[i]
+        if ch == open_c:
+            depth += 1
+        elif ch == close_c:
+            depth -= 1
+            if depth == 0:
+                return start, i + 1, open_c
     return None
 
 def _slice_brackets(s: str, open_c: str, close_c: str) -> Optional[str]:
@@ -0,0 +1,63 @@
+# api/utils/list_cache.py
+# Short-TTL in-process cache for the polled list endpoints (/api/actions, /api/history).
+# Per Lambda container: a write invalidates this container only, so another warm
+# container may serve a list up to LIST_CACHE_TTL seconds old. LIST_CACHE_TTL=0 disables.
+# Entries are the encoded JSON response body, so a hit is sent as-is (no re-encode).
+
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+    encode = orjson.dumps
+except ImportError:
+    def encode(value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+LIST_CACHE_TTL = float(os.getenv("LIST_CACHE_TTL", "3"))
+KEY_PREFIX = "finops"
+# list endpoints bound ?limit= to 1..LIST_LIMIT_MAX, so the key space is finite
+LIST_LIMIT_MAX = 200
+# at most this many bodies per container (oldest evicted first)
+MAX_ENTRIES = 64
+
+# key -> (expires_at monotonic, JSON body)
+_entries: Dict[str, Tuple[float, bytes]] = {}
+_lock = threading.Lock()
+
+
+def list_key(name: str, limit: int) -> str:
+    return f"{KEY_PREFIX}:{name}:{limit}"
+
+
+def get_cached(key: str) -> Optional[bytes]:
+    hit = _entries.get(key)
+    if hit is not None and time.monotonic() < hit[0]:
+        return hit[1]
+    return None
+
+
+def set_cached(key: str, value: Any) -> bytes:
+    """Encode value as JSON once, cache the bytes, and return them for the response."""
+    body = encode(value)
+    if LIST_CACHE_TTL > 0:
+        with _lock:
+            now = time.monotonic()
+            for k in [k for k, (exp, _) in _entries.items() if exp <= now]:
+                del _entries[k]
+            _entries.pop(key, None)  # re-insert at the end (dicts keep insertion order)
+            while len(_entries) >= MAX_ENTRIES:
+                del _entries[next(iter(_entries))]
+            _entries[key] = (now + LIST_CACHE_TTL, body)
+    return body
+
+
+def invalidate(name: str) -> None:
+    """Drop every cached page (all limits) of one list."""
+    prefix = f"{KEY_PREFIX}:{name}:"
+    with _lock:
+        for k in [k for k in _entries if k.startswith(prefix)]:
+            del _entries[k]
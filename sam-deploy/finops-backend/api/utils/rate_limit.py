@@ -1,36 +1,57 @@
 # backend/utils/rate_limit.py
 import time
-from collections import deque
-from typing import Deque, Dict, Tuple
+import threading
+from typing import Dict, List, Tuple
 
-class SlidingWindowLimiter:
+class TokenBucketLimiter:
     """
-    In-memory sliding window limiter.
-    key -> deque[timestamps]
+    In-memory token bucket limiter (O(1) per call).
+    key -> [tokens, last_refill]; capacity = limit, refilled at limit/window per second.
+    Idle buckets are garbage-collected so memory stays bounded by active keys.
     """
     def __init__(self, limit: int, window_seconds: int):
         self.limit = limit
         self.window = window_seconds
-        self.bucket: Dict[str, Deque[float]] = {}
+        self.rate = limit / float(window_seconds)
+        self.bucket: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._next_gc = time.monotonic() + window_seconds
 
     def allow(self, key: str) -> Tuple[bool, int]:
-        now = time.time()
-        dq = self.bucket.setdefault(key, deque())
-        # drop old
-        while dq and (now - dq[0]) > self.window:
-            dq.popleft()
-        if len(dq) < self.limit:
-            dq.append(now)
-            remaining = self.limit - len(dq)
-            return True, remaining
-        remaining = 0
-        return False, remaining
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_gc:
+                self._gc(now)
+            b = self.bucket.get(key)
+            if b is None:
+                b = self.bucket[key] = [float(self.limit), now]
+            else:
+                # refill
+                b[0] = min(float(self.limit), b[0] + (now - b[1]) * self.rate)
+                b[1] = now
+            if b[0] >= 1.0:
+                b[0] -= 1.0
+                return True, int(b[0])
+            return False, 0
+
+    def _gc(self, now: float) -> None:
+        # a bucket idle for a full window is back at capacity == a fresh bucket
+        stale = [k for k, (_, last) in self.bucket.items() if now - last >= self.window]
+        for k in stale:
+            del self.bucket[k]
+        self._next_gc = now + self.window
+
+# kept for existing imports
+SlidingWindowLimiter = TokenBucketLimiter
 
 # factory per-endpoint
-limiters: Dict[str, SlidingWindowLimiter] = {}
+limiters: Dict[str, TokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
 
-def get_limiter(name: str, limit: int, window_seconds: int) -> SlidingWindowLimiter:
+def get_limiter(name: str, limit: int, window_seconds: int) -> TokenBucketLimiter:
     key = f"{name}:{limit}:{window_seconds}"
-    if key not in limiters:
-        limiters[key] = SlidingWindowLimiter(limit, window_seconds)
-    return limiters[key]
+    lim = limiters.get(key)
+    if lim is None:
+        with _limiters_lock:
+            lim = limiters.setdefault(key, TokenBucketLimiter(limit, window_seconds))
+    return lim
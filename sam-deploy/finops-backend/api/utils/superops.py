@@ -2,13 +2,65 @@
 import os
 import json
 import logging
+import threading
+import boto3
 import requests
-from typing import Dict, Any
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # optional: faster encode/decode of action payloads
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger("finops-superops")
 
 SUPEROPS_BASE = os.getenv("SUPEROPS_BASE", "https://api.superops.ai")
 SUPEROPS_API_KEY = os.getenv("SUPEROPS_API_KEY")
+# Lambda whose handler is lambda_dispatch_handler (fire-and-forget dispatch)
+SUPEROPS_DISPATCH_FUNCTION = os.getenv("SUPEROPS_DISPATCH_FUNCTION")
+
+_session = None
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _superops_session() -> requests.Session:
+    """
+    One keep-alive Session per process (warm containers skip the TCP/TLS handshake).
+    POST is not idempotent, so only failed connects and 429/503 (not processed) retry.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=2, connect=2, read=0, status=2,
+            status_forcelist=(429, 503),
+            allowed_methods=frozenset({"POST"}),
+            backoff_factor=0.2,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=retry)
+        s = requests.Session()
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        s.headers.update({
+            "Authorization": f"Bearer {SUPEROPS_API_KEY}",
+            "Content-Type": "application/json",
+        })
+        _session = s
+    return _session
 
 def run_superops_action(action: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -25,13 +77,54 @@ def run_superops_action(action: Dict[str, Any]) -> Dict[str, Any]:
     try:
         # NOTE: Replace with the actual SuperOps endpoint when available.
         url = f"{SUPEROPS_BASE.rstrip('/')}/v1/agent/actions"
-        headers = {
-            "Authorization": f"Bearer {SUPEROPS_API_KEY}",
-            "Content-Type": "application/json",
-        }
-        resp = requests.post(url, headers=headers, data=json.dumps(action), timeout=15)
+        # body pre-encoded; Content-Type comes from the session headers
+        resp = _superops_session().post(url, data=_dumps(action), timeout=15)
         resp.raise_for_status()
-        return {"mode": "live", "status": resp.status_code, "data": resp.json()}
+        return {"mode": "live", "status": resp.status_code, "data": _loads(resp.content)}
     except Exception as e:
         logger.exception("SuperOps call failed")
         return {"mode": "live", "error": str(e), "echo": action}
+
+
+_lambda = None
+_lambda_lock = threading.Lock()
+
+
+def _lambda_client():
+    global _lambda
+    if _lambda is None:
+        with _lambda_lock:
+            if _lambda is None:
+                _lambda = boto3.session.Session().client(
+                    "lambda", config=Config(tcp_keepalive=True, retries={"max_attempts": 2})
+                )
+    return _lambda
+
+
+def queue_superops_action(action: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Fire-and-forget variant of run_superops_action. Without an API key the
+    dry-run result is returned as-is (no network). With SUPEROPS_DISPATCH_FUNCTION
+    set, the action is handed over as an async (Event) invoke, which returns
+    without waiting for SuperOps. Returns None when the caller must dispatch
+    it itself (no function configured, or the invoke failed).
+    """
+    if not SUPEROPS_API_KEY:
+        return run_superops_action(action)
+    if not SUPEROPS_DISPATCH_FUNCTION:
+        return None
+    try:
+        _lambda_client().invoke(
+            FunctionName=SUPEROPS_DISPATCH_FUNCTION,
+            InvocationType="Event",
+            Payload=_dumps(action),
+        )
+        return {"mode": "queued", "via": "lambda"}
+    except Exception:
+        logger.exception("SuperOps async invoke failed")
+        return None
+
+
+def lambda_dispatch_handler(event, context):
+    """Entry point for the SUPEROPS_DISPATCH_FUNCTION Lambda."""
+    return run_superops_action(event)